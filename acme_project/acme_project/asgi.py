@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'acme_project.settings')
+# Под ASGI главная, список и страница записи — асинхронные.
+os.environ.setdefault('ACME_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -23,13 +24,23 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    # Шаблоны виджетов форм Django для TemplatesSetting
+    # (см. birthday.widgets.TagSearchWidget).
+    'django.forms',
     'birthday.apps.BirthdayConfig',
     'pages.apps.PagesConfig',
     'django_bootstrap5',
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
+    'stats.apps.StatsConfig',
 ]
 
+# Асинхронные представления главной, списка и записи. Включает asgi.py:
+# под WSGI синхронные представления обходятся дешевле.
+ASYNC_VIEWS = os.environ.get('ACME_ASYNC_VIEWS') == '1'
+# Размер пула потоков для работы с БД из асинхронных представлений.
+ASYNC_DB_THREADS = int(os.environ.get('ACME_ASYNC_DB_THREADS', 8))
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -40,6 +51,12 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+if not ASYNC_VIEWS:
+    # Статистика SQL — только в синхронном режиме: под ASGI запросы
+    # идут из пула потоков БД, и execute_wrapper их не видит.
+    # Сразу после SecurityMiddleware, чтобы учесть сессии и auth.
+    MIDDLEWARE.insert(1, 'core.middleware.QueryStatsMiddleware')
+
 ROOT_URLCONF = 'acme_project.urls'
 
 TEMPLATES_DIR = BASE_DIR / 'templates'
@@ -69,6 +86,59 @@ DATABASES = {
     }
 }
 
+# Профиль базы данных: 'dev' — SQLite по умолчанию,
+# 'production' — WAL, прагмы, постоянные соединения
+# и отдельное соединение только для чтения.
+DATABASE_PROFILE = os.environ.get('ACME_DB_PROFILE', 'dev')
+
+# Прагмы SQLite, которые core.db выставляет каждому новому соединению.
+SQLITE_PRAGMAS = {}
+
+if DATABASE_PROFILE == 'production':
+    SQLITE_PRAGMAS = {
+        # Читатели не ждут писателя, писатель не ждёт читателей.
+        'journal_mode': 'WAL',
+        # В режиме WAL fsync при каждом коммите не нужен.
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        # Отрицательное значение — размер в КиБ: 64 МиБ.
+        'cache_size': -64 * 1024,
+        # Сколько миллисекунд ждать блокировку вместо «database is locked».
+        'busy_timeout': 5000,
+        'temp_store': 'MEMORY',
+    }
+    DATABASES['default'].update(
+        CONN_MAX_AGE=600,
+        CONN_HEALTH_CHECKS=True,
+    )
+    # Тот же файл, открытый только для чтения: сюда идут запросы
+    # на чтение вне транзакций (см. core.routers).
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f'{DATABASES["default"]["NAME"].as_uri()}?mode=ro',
+        'OPTIONS': {'uri': True},
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_ROUTERS = ['core.routers.ReadOnlyReplicaRouter']
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'acme',
+    }
+}
+
+# Общий для всех процессов кеш. Без него у каждого процесса свой
+# LocMemCache: выход или смена пароля в одном процессе не видны другим.
+REDIS_URL = os.environ.get('ACME_REDIS_URL')
+if REDIS_URL:
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    }
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -100,13 +170,65 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Как отдавать медиафайлы: 'direct' — из Django через sendfile(),
+# 'x-accel-redirect' — через nginx (internal-локация с префиксом ниже),
+# 'x-sendfile' — через Apache/lighttpd с модулем X-Sendfile.
+MEDIA_SERVE_MODE = 'direct'
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+
+# Число процессов, создающих уменьшенные копии фотографий.
+THUMBNAIL_WORKERS = 2
+# Сколько секунд помнить имя найденной копии фото и то, что копии
+# ещё нет (она может появиться, как только её допишет пул).
+THUMBNAIL_URL_CACHE_TTL = 24 * 60 * 60
+THUMBNAIL_MISSING_CACHE_TTL = 30
+
 # Подключаем бэкенд filebased.EmailBackend:
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 # Указываем директорию, в которую будут сохраняться файлы писем:
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
+# Очередь писем (core.OutgoingEmail): число попыток отправки
+# и базовая задержка перед повтором в секундах (удваивается с каждой попыткой).
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_DELAY = 60
+# Сколько секунд письмо, забранное обработчиком, недоступно остальным.
+OUTBOX_CLAIM_TIMEOUT = 600
 
 LOGIN_REDIRECT_URL = 'pages:homepage'
 
 LOGIN_URL = 'login'
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+
+# Режим пагинации списка дней рождения:
+# 'cursor' — по курсору на id, глубокие страницы стоят как первая;
+# 'page' — по номерам страниц с окном соседних ссылок.
+BIRTHDAY_LIST_PAGINATION = 'cursor'
+
+# Сколько секунд значения счётчиков (core.Counter) живут в памяти процесса.
+COUNTER_CACHE_TTL = 5
+
+# Время жизни в кеше страницы записи и страниц списка, в секундах.
+BIRTHDAY_DETAIL_CACHE_TTL = 300
+BIRTHDAY_LIST_CACHE_TTL = 60
+# Время жизни HTML строк списка; ключ строки меняется с updated_at.
+BIRTHDAY_ROW_CACHE_TTL = 3600
+# Сетка месяца календаря сбрасывается сигналами, TTL — страховка.
+BIRTHDAY_CALENDAR_CACHE_TTL = 24 * 60 * 60
+
+# Сколько одинаковых по форме SQL-запросов за запрос считать N+1.
+QUERY_STATS_N1_THRESHOLD = 3
+
+# Сессии и пользователей кешируем только при общем кеше (Redis):
+# сессии читаются из кеша, в БД только пишутся (и читаются при
+# промахе), а пользователь берётся из кеша, а не запросом к auth_user.
+if REDIS_URL:
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+    MIDDLEWARE[MIDDLEWARE.index(
+        'django.contrib.auth.middleware.AuthenticationMiddleware'
+    )] = 'users.middleware.CachedAuthenticationMiddleware'
+# Сколько секунд пользователь живёт в кеше users.middleware.
+USER_CACHE_TTL = 300
+
+# За сколько дней напоминать о днях рождения авторам без своих настроек.
+BIRTHDAY_REMINDER_DAYS = 1
@@ -1,21 +1,26 @@
+import re
+
 # Импортируем настройки проекта.
 from django.conf import settings
-# Импортируем функцию, позволяющую серверу разработки отдавать файлы.
-from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import include, path, reverse_lazy
+from django.urls import include, path, re_path, reverse_lazy
 from django.contrib.auth.forms import UserCreationForm
 from django.views.generic.edit import CreateView
 from django.contrib.auth.decorators import login_required
 
+from core.views import query_stats, serve_media
+
 
 handler404 = 'core.views.page_not_found'
 
 
 urlpatterns = [
     path('', include('pages.urls')),
+    # Раньше admin/: иначе адрес перехватит админка.
+    path('admin/query-stats/', query_stats, name='query_stats'),
     path('admin/', admin.site.urls),
     path('birthday/', include('birthday.urls')),
+    path('stats/', include('stats.urls')),
     # Подключаем urls.py приложения для работы с пользователями.
     path('auth/', include('django.contrib.auth.urls')),
     path(
@@ -27,5 +32,12 @@ urlpatterns = [
         ),
         name='registration',
     ),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    # Файлы из MEDIA_ROOT отдаёт core.views.serve_media —
+    # и при DEBUG, и в продакшене.
+    re_path(
+        rf'^{re.escape(settings.MEDIA_URL.lstrip("/"))}(?P<path>.*)$',
+        serve_media,
+        name='media',
+    ),
+]
 
@@ -1,6 +1,13 @@
 from django.contrib import admin
-from .models import Birthday, Tag
+from .models import Birthday, ReminderDigest, ReminderPreference, Tag
 
 
 admin.site.register(Birthday)
-admin.site.register(Tag)
\ No newline at end of file
+admin.site.register(Tag)
+admin.site.register(ReminderPreference)
+
+
+@admin.register(ReminderDigest)
+class ReminderDigestAdmin(admin.ModelAdmin):
+    list_display = ('user', 'date', 'birthdays', 'sent_at')
+    list_filter = ('date',)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class BirthdayConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'birthday'
+
+    def ready(self):
+        # Подключаем обработчики сигналов.
+        from . import signals  # noqa: F401
@@ -0,0 +1,130 @@
+"""
+Кеш страниц дней рождения с версионированными ключами.
+
+У каждой записи Birthday и у списка в целом есть свой номер версии.
+Обработчики сигналов увеличивают его при записи в БД, поэтому старые
+ключи просто перестают читаться и вытесняются кешем по TTL.
+"""
+import hashlib
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+
+LIST_VERSION_KEY = 'birthday:list:version'
+TAGS_VERSION_KEY = 'birthday:tags:version'
+
+# Счётчики попаданий и промахов в памяти процесса.
+_stats = Counter()
+_stats_lock = threading.Lock()
+_missing = object()
+
+
+def _detail_version_key(pk):
+    return f'birthday:detail:{pk}:version'
+
+
+def _calendar_version_key(month):
+    return f'birthday:calendar:{month}:version'
+
+
+def _get_version(key):
+    version = cache.get(key)
+    if version is None:
+        # Начальная версия от времени: если ключ версии вытеснен,
+        # новая всё равно не совпадёт со старыми записями кеша.
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key, time.time_ns())
+    return version
+
+
+def _bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def _get_or_load(kind, key, ttl, loader):
+    value = cache.get(key, _missing)
+    hit = value is not _missing
+    with _stats_lock:
+        _stats[f'{kind}_hits' if hit else f'{kind}_misses'] += 1
+    if not hit:
+        value = loader()
+        cache.set(key, value, ttl)
+    return value
+
+
+def get_birthday_detail(pk, loader):
+    """Возвращает данные страницы записи pk, загружая их через loader()."""
+    version = _get_version(_detail_version_key(pk))
+    return _get_or_load(
+        'detail',
+        f'birthday:detail:{pk}:v{version}',
+        getattr(settings, 'BIRTHDAY_DETAIL_CACHE_TTL', 300),
+        loader,
+    )
+
+
+def get_list_page(page_key, loader):
+    """Возвращает страницу списка page_key, загружая её через loader()."""
+    version = _get_version(LIST_VERSION_KEY)
+    # Ключ страницы приходит из запроса — хешируем его.
+    digest = hashlib.md5(page_key.encode()).hexdigest()
+    return _get_or_load(
+        'list',
+        f'birthday:list:v{version}:{digest}',
+        getattr(settings, 'BIRTHDAY_LIST_CACHE_TTL', 60),
+        loader,
+    )
+
+
+def invalidate_birthday(pk):
+    _bump_version(_detail_version_key(pk))
+
+
+def invalidate_list():
+    _bump_version(LIST_VERSION_KEY)
+
+
+def get_calendar_version(month):
+    return _get_version(_calendar_version_key(month))
+
+
+def get_calendar_month(year, month, page_key, loader):
+    """
+    Возвращает отрисованный месяц календаря, загружая его через loader().
+
+    page_key различает варианты одного месяца (например, с отметкой
+    сегодняшнего дня).
+    """
+    version = get_calendar_version(month)
+    return _get_or_load(
+        'calendar',
+        f'birthday:calendar:{year}-{month}:v{version}:{page_key}',
+        getattr(settings, 'BIRTHDAY_CALENDAR_CACHE_TTL', 24 * 60 * 60),
+        loader,
+    )
+
+
+def invalidate_calendar(months=range(1, 13)):
+    """Сбрасывает месяцы календаря; по умолчанию — все."""
+    for month in months:
+        _bump_version(_calendar_version_key(month))
+
+
+def get_tags_version():
+    return _get_version(TAGS_VERSION_KEY)
+
+
+def invalidate_tags():
+    _bump_version(TAGS_VERSION_KEY)
+
+
+def get_stats():
+    """Счётчики попаданий и промахов кеша в текущем процессе."""
+    with _stats_lock:
+        return dict(_stats)
@@ -0,0 +1,240 @@
+"""
+Генератор синтетических данных для бенчмарков и ручной проверки.
+
+Распределения похожи на живые данные: у немногих авторов
+и тегов большинство записей, возраст сосредоточен около 35 лет,
+а поздравлений у популярных записей на порядки больше, чем у прочих.
+"""
+import random
+from collections import defaultdict
+from datetime import date, timedelta
+from itertools import accumulate, islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from core.counters import add_to_counter
+
+from .cache import invalidate_calendar, invalidate_list, invalidate_tags
+from .models import (
+    BIRTHDAY_COUNTER, Birthday, Congratulation, Tag, make_tag_labels
+)
+from .signals import bulk_created
+
+User = get_user_model()
+
+MALE_NAMES = (
+    'Александр', 'Алексей', 'Дмитрий', 'Иван', 'Кирилл', 'Михаил',
+    'Никита', 'Павел', 'Сергей', 'Ярослав',
+)
+FEMALE_NAMES = (
+    'Анастасия', 'Анна', 'Виктория', 'Дарья', 'Екатерина', 'Елена',
+    'Ирина', 'Мария', 'Наталья', 'Ольга', 'Полина', 'Софья', 'Татьяна',
+    'Юлия',
+)
+LAST_NAMES = (
+    'Андреев', 'Васильев', 'Волков', 'Егоров', 'Зайцев', 'Иванов',
+    'Козлов', 'Кузнецов', 'Лебедев', 'Морозов', 'Никитин', 'Новиков',
+    'Орлов', 'Павлов', 'Петров', 'Попов', 'Семёнов', 'Смирнов',
+    'Соколов', 'Соловьёв', 'Фёдоров', 'Яковлев',
+)
+TAG_WORDS = (
+    'друзья', 'семья', 'работа', 'школа', 'универ', 'соседи', 'спорт',
+    'дача', 'клиенты', 'музыка', 'книги', 'походы', 'кино', 'игры',
+)
+CONGRATULATIONS = (
+    'С днём рождения!', 'Поздравляю!', 'Счастья и здоровья!',
+    'Всего самого лучшего!', 'Ура, с праздником!',
+)
+# Параметры возраста в годах: среднее, разброс и допустимые границы.
+AGE_MEAN = 35
+AGE_SIGMA = 15
+AGE_MIN = 2
+AGE_MAX = 100
+# Средняя доля записей с тегами и наибольшее число тегов у записи.
+TAGGED_SHARE = 0.7
+MAX_TAGS_PER_BIRTHDAY = 4
+# За сколько дней до запуска разбросаны поздравления.
+CONGRATULATION_DAYS = 365
+
+
+def zipf_weights(size, exponent=1.1):
+    """
+    Накопленные веса закона Ципфа для random.choices(cum_weights=...):
+    первые элементы выбираются намного чаще остальных.
+    """
+    return list(accumulate(
+        1 / rank ** exponent for rank in range(1, size + 1)
+    ))
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def generate_dataset(
+    users=0, birthdays=0, tags=0, congratulations=0,
+    seed=0, batch_size=2000, prefix='user',
+):
+    """
+    Создаёт пользователей, теги, записи и поздравления.
+
+    Вставляет данные через bulk_create(), поэтому сама заполняет
+    служебные поля записей и счётчик записей, отправляет
+    bulk_created и сбрасывает кеши.
+    Возвращает словарь с числом созданных объектов каждого вида.
+    """
+    rng = random.Random(seed)
+    created = dict(users=0, birthdays=0, tags=0, congratulations=0)
+
+    # Пользователи: пароль неиспользуемый, хешировать его не нужно.
+    start = User.objects.filter(username__startswith=prefix).count()
+    password = make_password(None)
+    for chunk in chunked(range(start, start + users), batch_size):
+        created['users'] += len(User.objects.bulk_create(
+            User(username=f'{prefix}{number}', password=password)
+            for number in chunk
+        ))
+    author_ids = list(
+        User.objects.order_by('id').values_list('id', flat=True)
+    )
+
+    # Теги: к существующим добавляем недостающие.
+    tag_ids = dict(Tag.objects.values_list('tag', 'id'))
+    names = [
+        f'{TAG_WORDS[number % len(TAG_WORDS)]}{number // len(TAG_WORDS)}'
+        for number in range(tags)
+    ]
+    missing = [name for name in names if name not in tag_ids]
+    for tag in Tag.objects.bulk_create(
+        (Tag(tag=name) for name in missing), batch_size=batch_size
+    ):
+        tag_ids[tag.tag] = tag.id
+    created['tags'] = len(missing)
+    tag_names = list(tag_ids)
+    rng.shuffle(tag_names)
+    tag_weights = zipf_weights(len(tag_names))
+    author_weights = zipf_weights(len(author_ids))
+
+    today = date.today()
+    birthday_ids = []
+    seen = set()
+    rows = generate_birthday_rows(rng, birthdays, today)
+    for chunk in chunked(rows, batch_size):
+        items = []
+        for first_name, last_name, birthday in chunk:
+            key = (first_name, last_name, birthday)
+            if key in seen:
+                continue
+            seen.add(key)
+            item_tags = []
+            if tag_names and rng.random() < TAGGED_SHARE:
+                item_tags = set(rng.choices(
+                    tag_names, cum_weights=tag_weights,
+                    k=rng.randint(1, MAX_TAGS_PER_BIRTHDAY),
+                ))
+                item_tags = sorted(item_tags, key=tag_ids.get)
+            author_id = None
+            if author_ids:
+                author_id = rng.choices(
+                    author_ids, cum_weights=author_weights
+                )[0]
+            birthday = Birthday(
+                first_name=first_name,
+                last_name=last_name,
+                birthday=birthday,
+                author_id=author_id,
+                tag_labels=make_tag_labels(item_tags),
+            )
+            birthday.fill_derived_fields()
+            items.append((birthday, item_tags))
+        # Пропускаем сочетания, которые уже есть в базе.
+        existing = set(Birthday.objects.filter(
+            birthday__in={item.birthday for item, _ in items},
+            first_name__in={item.first_name for item, _ in items},
+        ).values_list('first_name', 'last_name', 'birthday'))
+        items = [
+            (birthday, item_tags) for birthday, item_tags in items
+            if (birthday.first_name, birthday.last_name, birthday.birthday)
+            not in existing
+        ]
+        inserted = Birthday.objects.bulk_create(
+            [birthday for birthday, _ in items]
+        )
+        Through = Birthday.tags.through
+        links = Through.objects.bulk_create(
+            Through(birthday_id=birthday.id, tag_id=tag_ids[tag])
+            for birthday, (_, item_tags) in zip(inserted, items)
+            for tag in item_tags
+        )
+        bulk_created.send(sender=Birthday, objects=inserted)
+        bulk_created.send(sender=Through, objects=links)
+        birthday_ids.extend(birthday.id for birthday in inserted)
+    created['birthdays'] = len(birthday_ids)
+
+    # Поздравления: у популярных записей их на порядки больше.
+    if birthday_ids and author_ids:
+        weights = list(accumulate(
+            rng.paretovariate(1.2) for _ in birthday_ids
+        ))
+        now = timezone.now()
+        for chunk in chunked(range(congratulations), batch_size):
+            inserted = Congratulation.objects.bulk_create(
+                Congratulation(
+                    birthday_id=birthday_id,
+                    author_id=rng.choices(
+                        author_ids, cum_weights=author_weights
+                    )[0],
+                    text=rng.choice(CONGRATULATIONS),
+                )
+                for birthday_id in rng.choices(
+                    birthday_ids, cum_weights=weights, k=len(chunk)
+                )
+            )
+            # auto_now_add ставит всем время вставки: разносим
+            # поздравления по прошлым дням, по UPDATE на каждый день.
+            by_day = defaultdict(list)
+            for item in inserted:
+                by_day[rng.randrange(CONGRATULATION_DAYS)].append(item)
+            with transaction.atomic():
+                for days, items in by_day.items():
+                    moment = now - timedelta(
+                        days=days, seconds=rng.randrange(24 * 60 * 60)
+                    )
+                    Congratulation.objects.filter(
+                        pk__in=[item.pk for item in items]
+                    ).update(created_at=moment)
+                    for item in items:
+                        item.created_at = moment
+            bulk_created.send(sender=Congratulation, objects=inserted)
+            created['congratulations'] += len(inserted)
+
+    if created['birthdays']:
+        add_to_counter(BIRTHDAY_COUNTER, created['birthdays'])
+        invalidate_list()
+        invalidate_calendar()
+    if created['tags']:
+        invalidate_tags()
+    return created
+
+
+def generate_birthday_rows(rng, count, today):
+    """Имена и даты рождения с возрастом около AGE_MEAN лет."""
+    for _ in range(count):
+        age = min(max(rng.gauss(AGE_MEAN, AGE_SIGMA), AGE_MIN), AGE_MAX)
+        last_name = rng.choice(LAST_NAMES)
+        if rng.random() < 0.5:
+            first_name = rng.choice(MALE_NAMES)
+        else:
+            first_name = rng.choice(FEMALE_NAMES)
+            # Женская форма фамилии.
+            last_name += 'а'
+        yield (
+            first_name,
+            last_name,
+            today - timedelta(days=int(age * 365.25)),
+        )
@@ -0,0 +1,73 @@
+"""
+Потоковая выгрузка дней рождения в CSV и JSONL.
+
+Записи читаются через QuerySet.iterator(chunk_size=...), а теги
+подгружаются одним запросом на чанк, поэтому расход памяти
+не зависит от числа строк. Формат совпадает с тем, что принимает
+команда import_birthdays.
+"""
+import csv
+import json
+
+from .models import Birthday
+
+EXPORT_FIELDS = ('first_name', 'last_name', 'birthday', 'tags', 'author')
+EXPORT_FORMATS = ('csv', 'jsonl')
+# Разделитель тегов в колонке tags CSV-файла.
+CSV_TAG_SEPARATOR = ';'
+CHUNK_SIZE = 2000
+
+
+def get_export_queryset(author=None, date_from=None, date_to=None):
+    """Записи для выгрузки с фильтрами по username автора и дате рождения."""
+    queryset = Birthday.objects.all()
+    if author:
+        queryset = queryset.filter(author__username=author)
+    if date_from:
+        queryset = queryset.filter(birthday__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(birthday__lte=date_to)
+    return queryset
+
+
+def iter_rows(queryset, chunk_size=CHUNK_SIZE):
+    """Словари строк выгрузки; теги загружаются один раз на чанк."""
+    birthdays = queryset.select_related('author').only(
+        'first_name', 'last_name', 'birthday', 'author__username'
+    ).prefetch_related('tags').order_by('id')
+    for birthday in birthdays.iterator(chunk_size=chunk_size):
+        yield {
+            'first_name': birthday.first_name,
+            'last_name': birthday.last_name,
+            'birthday': birthday.birthday.isoformat(),
+            'tags': [tag.tag for tag in birthday.tags.all()],
+            'author': birthday.author.username if birthday.author else '',
+        }
+
+
+class Echo:
+    """Буфер, который сразу возвращает записанное, для csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        row['tags'] = CSV_TAG_SEPARATOR.join(row['tags'])
+        yield writer.writerow([row[field] for field in EXPORT_FIELDS])
+
+
+def iter_jsonl(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+def iter_export(queryset, export_format, chunk_size=CHUNK_SIZE):
+    """Строки выгрузки в формате export_format ('csv' или 'jsonl')."""
+    rows = iter_rows(queryset, chunk_size)
+    if export_format == 'jsonl':
+        return iter_jsonl(rows)
+    return iter_csv(rows)
@@ -1,19 +1,42 @@
 from django import forms
 # Импортируем класс ошибки валидации.
 from django.core.exceptions import ValidationError
-from django.core.mail import send_mail
+
+from core.mail import queue_mail
 
 # Импортируем класс модели Birthday.
 from .models import Birthday, Congratulation
+from .widgets import TagSearchWidget
 
 
 # Множество с именами участников Ливерпульской четвёрки.
 BEATLES = {'Джон Леннон', 'Пол Маккартни', 'Джордж Харрисон', 'Ринго Старр'}
+BEATLES_ERROR = 'Мы тоже любим Битлз, но введите, пожалуйста, настоящее имя!'
+
+
+# Правила формы вынесены в функции: их же применяет импорт записей.
+def get_first_name(first_name):
+    # Разбиваем полученную строку по пробелам
+    # и возвращаем только первое имя.
+    return first_name.split()[0]
+
+
+def is_beatles_member(first_name, last_name):
+    # Проверяем вхождение сочетания имени и фамилии во множество имён.
+    return f'{first_name} {last_name}' in BEATLES
 
 
 # Для использования формы с моделями меняем класс на forms.ModelForm.
 class BirthdayForm(forms.ModelForm):
     # Удаляем все описания полей.ModelForm
+    # Флажок появляется, только если нашлись похожие записи.
+    confirm_duplicate = forms.BooleanField(
+        label='Это другой человек — всё равно сохранить',
+        required=False,
+        widget=forms.HiddenInput,
+    )
+    # Найденные похожие записи — для предупреждения в шаблоне.
+    duplicates = ()
 
     # Все настройки задаём в подклассе Meta.
     class Meta:
@@ -23,15 +46,18 @@ class BirthdayForm(forms.ModelForm):
         # fields = '__all__'
         exclude = ('author',)
         widgets = {
-            'birthday': forms.DateInput(attrs={'type': 'date'})
+            'birthday': forms.DateInput(attrs={'type': 'date'}),
+            # Не выводим все теги из базы — только выбранные и поиск.
+            'tags': TagSearchWidget(),
+        }
+        help_texts = {
+            'tags': 'Начните вводить название и выберите тег из списка',
         }
 
     def clean_first_name(self):
         # Получаем значение имени из словаря очищенных данных.
         first_name = self.cleaned_data['first_name']
-    # Разбиваем полученную строку по пробелам
-    # и возвращаем только первое имя.
-        return first_name.split()[0]
+        return get_first_name(first_name)
 
     def clean(self):
         # Вызов родительского метода clean.
@@ -39,20 +65,35 @@ class BirthdayForm(forms.ModelForm):
         # Получаем имя и фамилию из очищенных полей формы.
         first_name = self.cleaned_data['first_name']
         last_name = self.cleaned_data['last_name']
-        # Проверяем вхождение сочетания имени и фамилии во множество имён.
-        if f'{first_name} {last_name}' in BEATLES:
-            # Отправляем письмо, если кто-то представляется
-            # именем одного из участников Beatles.
-            send_mail(
+        if is_beatles_member(first_name, last_name):
+            # Ставим в очередь письмо, если кто-то представляется
+            # именем одного из участников Beatles: отправит его
+            # команда send_queued_mail, а не этот запрос.
+            queue_mail(
                 subject='Another Beatles member',
                 message=f'{first_name} {last_name} пытался опубликовать запись!',
                 from_email='birthday_form@acme.not',
                 recipient_list=['admin@acme.not'],
-                fail_silently=True,
             )
-            raise ValidationError(
-                'Мы тоже любим Битлз, но введите, пожалуйста, настоящее имя!'
+            raise ValidationError(BEATLES_ERROR)
+        # Ищем похожие записи по индексу ключа имени.
+        if not self.cleaned_data.get('confirm_duplicate'):
+            birthday = self.cleaned_data.get('birthday')
+            if birthday is None:
+                return
+            candidate = Birthday(
+                pk=self.instance.pk,
+                first_name=first_name,
+                last_name=last_name,
+                birthday=birthday,
             )
+            self.duplicates = list(candidate.find_similar())
+            if self.duplicates:
+                self.fields['confirm_duplicate'].widget = forms.CheckboxInput()
+                raise ValidationError(
+                    'Похоже, такая запись уже есть. Если это другой человек, '
+                    'отметьте флажок ниже и отправьте форму ещё раз.'
+                )
 
 
 class CongratulationForm(forms.ModelForm):
@@ -0,0 +1,66 @@
+import random
+from datetime import date, timedelta
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from birthday.utils import (
+    calculate_birthday_countdown, calculate_birthday_countdowns
+)
+
+# Объёмы выборки по умолчанию.
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+# Диапазон дат рождения: от 120 лет назад до сегодняшнего дня.
+MAX_AGE_DAYS = 120 * 365
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает скорость calculate_birthday_countdown() по одной дате '
+        'и пакетной calculate_birthday_countdowns().'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', nargs='+', type=int, default=DEFAULT_SIZES,
+            help='Количество дат в каждом прогоне.',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=3,
+            help='Сколько раз повторить замер; берётся лучшее время.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        today = date.today()
+        self.stdout.write(
+            f'{"dates":>10} {"per-row, s":>12} {"batch, s":>10} {"speedup":>8}'
+        )
+        for size in options['sizes']:
+            birthdays = [
+                today - timedelta(days=rng.randrange(MAX_AGE_DAYS))
+                for _ in range(size)
+            ]
+            per_row = self.measure(
+                lambda: [calculate_birthday_countdown(b) for b in birthdays],
+                options['repeat'],
+            )
+            batch = self.measure(
+                lambda: calculate_birthday_countdowns(birthdays, today),
+                options['repeat'],
+            )
+            self.stdout.write(
+                f'{size:>10} {per_row:>12.4f} {batch:>10.4f} '
+                f'{per_row / batch:>7.1f}x'
+            )
+
+    @staticmethod
+    def measure(func, repeat):
+        best = None
+        for _ in range(repeat):
+            started = perf_counter()
+            func()
+            elapsed = perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
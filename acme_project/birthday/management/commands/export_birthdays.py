@@ -0,0 +1,47 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from birthday.export import (
+    CHUNK_SIZE, EXPORT_FORMATS, get_export_queryset, iter_export
+)
+
+
+def date_argument(value):
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise CommandError(f'Некорректная дата: {value}')
+    return parsed
+
+
+class Command(BaseCommand):
+    help = 'Потоково выгружает дни рождения в CSV или JSONL.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format', choices=EXPORT_FORMATS, default='csv'
+        )
+        parser.add_argument(
+            '--output', help='Файл для выгрузки; по умолчанию — stdout.'
+        )
+        parser.add_argument('--author', help='username автора записей.')
+        parser.add_argument('--date-from', type=date_argument)
+        parser.add_argument('--date-to', type=date_argument)
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        queryset = get_export_queryset(
+            options['author'], options['date_from'], options['date_to']
+        )
+        lines = iter_export(
+            queryset, options['format'], options['chunk_size']
+        )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.writelines(lines)
+        else:
+            sys.stdout.writelines(lines)
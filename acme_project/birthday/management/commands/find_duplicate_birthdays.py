@@ -0,0 +1,72 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from birthday.models import Birthday
+from birthday.utils import make_name_key
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет ключ имени (name_key) и выводит группы похожих записей: '
+        'с одинаковым ключом имени и датой рождения.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--backfill', action='store_true',
+            help='Сначала пересчитать name_key у всех записей.',
+        )
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument(
+            '--limit', type=int, default=50,
+            help='Сколько групп дубликатов вывести.',
+        )
+
+    def handle(self, *args, **options):
+        if options['backfill']:
+            updated = self.backfill(options['batch_size'])
+            self.stdout.write(f'Ключ имени обновлён у записей: {updated}')
+
+        clusters = Birthday.objects.values('name_key', 'birthday').annotate(
+            size=Count('id')
+        ).filter(size__gt=1).order_by('-size', 'name_key')
+        total = clusters.count()
+        self.stdout.write(f'Групп похожих записей: {total}')
+        for cluster in clusters[:options['limit']]:
+            birthdays = Birthday.objects.filter(
+                name_key=cluster['name_key'], birthday=cluster['birthday']
+            ).order_by('id')
+            names = ', '.join(
+                f'#{birthday.pk} {birthday.first_name} {birthday.last_name}'
+                .strip()
+                for birthday in birthdays
+            )
+            self.stdout.write(
+                f'{cluster["name_key"]!r} {cluster["birthday"]} '
+                f'({cluster["size"]}): {names}'
+            )
+
+    @staticmethod
+    def backfill(batch_size):
+        """Пересчитывает name_key пачками по id; возвращает число изменений."""
+        updated = 0
+        last_id = 0
+        while True:
+            birthdays = list(
+                Birthday.objects.filter(id__gt=last_id).order_by('id').only(
+                    'id', 'first_name', 'last_name', 'name_key'
+                )[:batch_size]
+            )
+            if not birthdays:
+                return updated
+            last_id = birthdays[-1].id
+            changed = []
+            for birthday in birthdays:
+                name_key = make_name_key(
+                    birthday.first_name, birthday.last_name
+                )
+                if birthday.name_key != name_key:
+                    birthday.name_key = name_key
+                    changed.append(birthday)
+            Birthday.objects.bulk_update(changed, ('name_key',))
+            updated += len(changed)
@@ -0,0 +1,49 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from birthday.datasets import generate_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, тегами, записями '
+        'и поздравлениями с правдоподобными распределениями.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--birthdays', type=int, default=10_000)
+        parser.add_argument('--tags', type=int, default=200)
+        parser.add_argument(
+            '--congratulations', type=int, default=None,
+            help='По умолчанию — вдвое больше, чем записей.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument(
+            '--prefix', default='user',
+            help='Начало username создаваемых пользователей.',
+        )
+
+    def handle(self, *args, **options):
+        congratulations = options['congratulations']
+        if congratulations is None:
+            congratulations = options['birthdays'] * 2
+        started = perf_counter()
+        with transaction.atomic():
+            created = generate_dataset(
+                users=options['users'],
+                birthdays=options['birthdays'],
+                tags=options['tags'],
+                congratulations=congratulations,
+                seed=options['seed'],
+                batch_size=options['batch_size'],
+                prefix=options['prefix'],
+            )
+        self.stdout.write(self.style.SUCCESS(
+            'Создано пользователей: {users}, тегов: {tags}, записей: '
+            '{birthdays}, поздравлений: {congratulations}'.format(**created)
+            + f'. {perf_counter() - started:.1f} с'
+        ))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from birthday.models import Birthday
+from birthday.thumbnails import (
+    get_executor, make_thumbnails, thumbnails_exist
+)
+
+
+class Command(BaseCommand):
+    help = 'Создаёт уменьшенные копии фотографий, у которых их ещё нет.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Пересоздать копии, даже если они уже есть.',
+        )
+
+    def handle(self, *args, **options):
+        birthdays = Birthday.objects.exclude(image='').only('id', 'image')
+        futures = [
+            get_executor().submit(make_thumbnails, birthday.image.path)
+            for birthday in birthdays.iterator()
+            if options['force'] or not thumbnails_exist(birthday.image)
+        ]
+        created = errors = 0
+        for future in futures:
+            try:
+                created += len(future.result())
+            except OSError as error:
+                errors += 1
+                self.stderr.write(str(error))
+        self.stdout.write(
+            f'Обработано файлов: {len(futures)}, создано копий: {created}, '
+            f'ошибок: {errors}'
+        )
@@ -0,0 +1,267 @@
+import csv
+import json
+import sys
+from itertools import islice
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+
+from birthday.cache import (
+    invalidate_calendar, invalidate_list, invalidate_tags
+)
+from birthday.export import CSV_TAG_SEPARATOR
+from birthday.forms import BEATLES_ERROR, get_first_name, is_beatles_member
+from birthday.models import (
+    BIRTHDAY_COUNTER, Birthday, Tag, make_tag_labels
+)
+from birthday.signals import bulk_created
+from core.counters import add_to_counter
+
+User = get_user_model()
+
+
+class RowError(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково импортирует дни рождения из CSV или JSONL. '
+        'Колонки: first_name, last_name, birthday (ГГГГ-ММ-ДД), '
+        f'tags (в CSV — через «{CSV_TAG_SEPARATOR}»), author (username).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл для импорта или «-» для stdin.')
+        parser.add_argument(
+            '--format', choices=('csv', 'jsonl'),
+            help='Формат файла; по умолчанию — по расширению.',
+        )
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument(
+            '--author',
+            help='username автора для строк без колонки author.',
+        )
+        parser.add_argument(
+            '--max-errors', type=int, default=20,
+            help='Сколько ошибок в строках вывести подробно.',
+        )
+
+    def handle(self, *args, **options):
+        file_format = options['format'] or (
+            'jsonl' if options['path'].endswith(('.jsonl', '.json')) else 'csv'
+        )
+        self.fields = {
+            name: Birthday._meta.get_field(name)
+            for name in ('first_name', 'last_name', 'birthday')
+        }
+        tag_field = Tag._meta.get_field('tag')
+        self.tag_max_length = tag_field.max_length
+        # Теги и авторы разрешаются через словари в памяти.
+        self.tag_ids = dict(Tag.objects.values_list('tag', 'id'))
+        tags_count = len(self.tag_ids)
+        self.author_ids = {}
+        self.default_author = options['author']
+        self.max_errors = options['max_errors']
+        self.verbosity = options['verbosity']
+        self.stats = dict(read=0, inserted=0, invalid=0, conflicts=0)
+
+        started = perf_counter()
+        if options['path'] == '-':
+            self.import_rows(
+                self.read_rows(sys.stdin, file_format), options['chunk_size']
+            )
+        else:
+            try:
+                file = open(options['path'], encoding='utf-8-sig', newline='')
+            except OSError as error:
+                raise CommandError(error)
+            with file:
+                self.import_rows(
+                    self.read_rows(file, file_format), options['chunk_size']
+                )
+        elapsed = perf_counter() - started
+
+        if self.stats['inserted']:
+            add_to_counter(BIRTHDAY_COUNTER, self.stats['inserted'])
+            invalidate_list()
+            # Даты в файле любые: сбрасываем календарь целиком.
+            invalidate_calendar()
+        if len(self.tag_ids) != tags_count:
+            invalidate_tags()
+        rate = self.stats['read'] / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            'Прочитано: {read}, добавлено: {inserted}, с ошибками: {invalid}, '
+            'уже были в базе: {conflicts}'.format(**self.stats)
+            + f'. {elapsed:.1f} с, {rate:.0f} строк/с'
+        ))
+
+    @staticmethod
+    def read_rows(file, file_format):
+        """Построчно читает файл, не загружая его в память целиком."""
+        if file_format == 'csv':
+            for line_number, row in enumerate(csv.DictReader(file), start=2):
+                tags = row.get('tags') or ''
+                row['tags'] = [
+                    tag for tag in tags.split(CSV_TAG_SEPARATOR) if tag.strip()
+                ]
+                yield line_number, row
+            return
+        for line_number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as error:
+                yield line_number, error
+                continue
+            yield line_number, row
+
+    def import_rows(self, rows, chunk_size):
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            started = perf_counter()
+            self.import_chunk(chunk)
+            if self.verbosity > 1:
+                self.stdout.write(
+                    f'Строк: {self.stats["read"]}, '
+                    f'{len(chunk) / (perf_counter() - started):.0f} строк/с'
+                )
+
+    def import_chunk(self, chunk):
+        self.stats['read'] += len(chunk)
+        self.resolve_authors(
+            row.get('author') for _, row in chunk if isinstance(row, dict)
+        )
+        birthdays = {}
+        for line_number, row in chunk:
+            try:
+                birthday, tags = self.clean_row(row)
+            except (RowError, ValidationError) as error:
+                self.report_error(line_number, error)
+                continue
+            key = (birthday.first_name, birthday.last_name, birthday.birthday)
+            if key in birthdays:
+                self.stats['conflicts'] += 1
+                continue
+            birthdays[key] = (birthday, tags)
+
+        # Отбрасываем записи, которые нарушат «Unique person constraint»:
+        # один запрос на весь чанк вместо проверки каждой строки.
+        existing = Birthday.objects.filter(
+            birthday__in={key[2] for key in birthdays},
+            first_name__in={key[0] for key in birthdays},
+        ).values_list('first_name', 'last_name', 'birthday')
+        for key in existing:
+            if birthdays.pop(key, None) is not None:
+                self.stats['conflicts'] += 1
+        if not birthdays:
+            return
+        tag_ids = dict(self.tag_ids)
+        try:
+            with transaction.atomic():
+                self.stats['inserted'] += self.insert(list(birthdays.values()))
+        except IntegrityError:
+            # Запись с тем же ключом успел добавить кто-то другой:
+            # вставляем чанк построчно и пропускаем конфликты.
+            self.tag_ids = tag_ids
+            for item in birthdays.values():
+                item[0].pk = None
+                try:
+                    with transaction.atomic():
+                        self.stats['inserted'] += self.insert([item])
+                except IntegrityError:
+                    self.tag_ids = dict(tag_ids)
+                    self.stats['conflicts'] += 1
+                else:
+                    tag_ids = dict(self.tag_ids)
+
+    def insert(self, items):
+        missing_tags = {
+            tag for _, tags in items for tag in tags
+            if tag not in self.tag_ids
+        }
+        if missing_tags:
+            for tag in Tag.objects.bulk_create(
+                Tag(tag=name) for name in sorted(missing_tags)
+            ):
+                self.tag_ids[tag.tag] = tag.id
+        for birthday, tags in items:
+            # Порядок тегов — как у refresh_tag_labels(): по id тега.
+            birthday.tag_labels = make_tag_labels(
+                sorted(set(tags), key=self.tag_ids.get)
+            )
+        birthdays = Birthday.objects.bulk_create(
+            [birthday for birthday, _ in items]
+        )
+        links = Birthday.tags.through.objects.bulk_create(
+            Birthday.tags.through(birthday_id=birthday.id, tag_id=tag_id)
+            for birthday, (_, tags) in zip(birthdays, items)
+            for tag_id in {self.tag_ids[tag] for tag in tags}
+        )
+        # Обработчики сигнала работают в той же транзакции, что и
+        # вставка чанка.
+        bulk_created.send(sender=Birthday, objects=birthdays)
+        bulk_created.send(sender=Birthday.tags.through, objects=links)
+        return len(birthdays)
+
+    def clean_row(self, row):
+        """Проверяет строку по правилам модели и BirthdayForm."""
+        if not isinstance(row, dict):
+            raise RowError(f'Некорректная строка: {row}')
+        values = {}
+        for name, field in self.fields.items():
+            value = row.get(name) or ''
+            if isinstance(value, str):
+                value = value.strip()
+            # Валидаторы поля, в том числе real_age для даты рождения.
+            values[name] = field.clean(value, None)
+        values['first_name'] = get_first_name(values['first_name'])
+        if is_beatles_member(values['first_name'], values['last_name']):
+            raise RowError(BEATLES_ERROR)
+
+        tags = row.get('tags') or []
+        if isinstance(tags, str):
+            tags = [tags]
+        tags = [str(tag).strip() for tag in tags]
+        for tag in tags:
+            if not tag or len(tag) > self.tag_max_length:
+                raise RowError(f'Некорректный тег: {tag!r}')
+
+        username = row.get('author') or self.default_author
+        author_id = None
+        if username:
+            author_id = self.author_ids.get(username)
+            if author_id is None:
+                raise RowError(f'Нет пользователя {username!r}')
+        birthday = Birthday(author_id=author_id, **values)
+        # bulk_create() не вызывает save(): служебные поля заполняем сами.
+        birthday.fill_derived_fields()
+        return birthday, tags
+
+    def resolve_authors(self, usernames):
+        missing = {
+            username for username in usernames
+            if username and username not in self.author_ids
+        }
+        if self.default_author and self.default_author not in self.author_ids:
+            missing.add(self.default_author)
+        if missing:
+            self.author_ids.update(
+                User.objects.filter(username__in=missing).values_list(
+                    'username', 'id'
+                )
+            )
+
+    def report_error(self, line_number, error):
+        self.stats['invalid'] += 1
+        if self.stats['invalid'] > self.max_errors:
+            return
+        if isinstance(error, ValidationError):
+            error = '; '.join(error.messages)
+        self.stderr.write(f'Строка {line_number}: {error}')
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from birthday.models import BIRTHDAY_COUNTER, Birthday
+from core.counters import set_counter
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчик записей Birthday и исправляет расхождение.'
+
+    def handle(self, *args, **options):
+        actual = Birthday.objects.count()
+        previous = set_counter(BIRTHDAY_COUNTER, actual)
+        if previous is None:
+            self.stdout.write(f'Счётчик создан: {actual}')
+        elif previous != actual:
+            self.stdout.write(self.style.WARNING(
+                f'Расхождение исправлено: {previous} -> {actual}'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Счётчик верен: {actual}'))
@@ -0,0 +1,49 @@
+from datetime import date
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand, CommandError
+
+from birthday.datasets import chunked
+from birthday.models import ReminderDigest
+from birthday.reminders import collect_digests, send_digest_batch
+
+
+class Command(BaseCommand):
+    help = (
+        'Отправляет авторам дневные сводки о ближайших днях рождения '
+        'их записей. Повторный запуск в тот же день досылает только '
+        'неотправленные сводки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument(
+            '--date', type=date.fromisoformat,
+            help='День рассылки в формате ГГГГ-ММ-ДД, по умолчанию сегодня.',
+        )
+
+    def handle(self, *args, **options):
+        today = options['date'] or date.today()
+        digests = collect_digests(today)
+        if not digests:
+            self.stdout.write('Отправлять нечего')
+            return
+        connection = get_connection(fail_silently=False)
+        marked = ReminderDigest.objects.filter(date=today)
+        already_sent = marked.count()
+        sent = 0
+        try:
+            connection.open()
+            for batch in chunked(digests, options['batch_size']):
+                send_digest_batch(batch, connection, today)
+                sent += len(batch)
+        except OSError as error:
+            # Пачка могла уйти частично: считаем по отметкам.
+            sent = marked.count() - already_sent
+            raise CommandError(
+                f'Отправлено сводок: {sent} из {len(digests)}; '
+                f'остальные уйдут при следующем запуске. Ошибка: {error}'
+            )
+        finally:
+            connection.close()
+        self.stdout.write(f'Отправлено сводок: {sent}')
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:52
+
+from django.db import migrations, models
+
+
+def get_month_day(birthday):
+    """Ключ «месяц-день» на момент миграции: 29 февраля — это 1 марта."""
+    if (birthday.month, birthday.day) == (2, 29):
+        return 301
+    return birthday.month * 100 + birthday.day
+
+
+def fill_month_day(apps, schema_editor):
+    Birthday = apps.get_model('birthday', 'Birthday')
+    birthdays = list(Birthday.objects.only('id', 'birthday'))
+    for birthday in birthdays:
+        birthday.month_day = get_month_day(birthday.birthday)
+    Birthday.objects.bulk_update(birthdays, ('month_day',), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('birthday', '0005_tag_birthday_tags'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='birthday',
+            name='month_day',
+            field=models.PositiveSmallIntegerField(db_index=True, default=0, editable=False, verbose_name='Месяц и день'),
+        ),
+        migrations.RunPython(fill_month_day, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:58
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def fill_tag_labels(apps, schema_editor):
+    Birthday = apps.get_model('birthday', 'Birthday')
+    labels = defaultdict(list)
+    links = Birthday.tags.through.objects.order_by('tag_id').values_list(
+        'birthday_id', 'tag__tag'
+    )
+    for birthday_id, tag in links:
+        labels[birthday_id].append(tag)
+    Birthday.objects.bulk_update(
+        [
+            Birthday(pk=pk, tag_labels=', '.join(tags))
+            for pk, tags in labels.items()
+        ],
+        ('tag_labels',),
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('birthday', '0006_birthday_month_day'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='birthday',
+            name='tag_labels',
+            field=models.TextField(blank=True, editable=False, verbose_name='Теги'),
+        ),
+        migrations.RunPython(fill_tag_labels, migrations.RunPython.noop),
+    ]
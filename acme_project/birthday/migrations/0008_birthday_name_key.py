@@ -0,0 +1,56 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:00
+
+import re
+
+from django.db import migrations, models
+
+# Копия birthday.utils на момент миграции: изменения в приложении
+# не должны менять уже применённое заполнение.
+TRANSLIT = str.maketrans({
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'e',
+    'ж': 'zh', 'з': 'z', 'и': 'i', 'й': 'i', 'к': 'k', 'л': 'l', 'м': 'm',
+    'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
+    'ф': 'f', 'х': 'h', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'sch',
+    'ъ': '', 'ы': 'i', 'ь': '', 'э': 'e', 'ю': 'iu', 'я': 'ia',
+    'j': 'i', 'y': 'i', 'w': 'v',
+})
+NAME_KEY_MAX_LENGTH = 100
+
+
+def make_name_key(first_name, last_name):
+    parts = []
+    for name in (first_name, last_name):
+        name = name.casefold().translate(TRANSLIT)
+        name = re.sub(r'[^a-z0-9]', '', name)
+        parts.append(re.sub(r'([a-z])\1+', r'\1', name))
+    return ' '.join(part for part in parts if part)[:NAME_KEY_MAX_LENGTH]
+
+
+def fill_name_key(apps, schema_editor):
+    Birthday = apps.get_model('birthday', 'Birthday')
+    birthdays = list(Birthday.objects.only('id', 'first_name', 'last_name'))
+    for birthday in birthdays:
+        birthday.name_key = make_name_key(
+            birthday.first_name, birthday.last_name
+        )
+    Birthday.objects.bulk_update(birthdays, ('name_key',), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('birthday', '0007_birthday_tag_labels'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='birthday',
+            name='name_key',
+            field=models.CharField(blank=True, editable=False, max_length=100, verbose_name='Ключ имени'),
+        ),
+        migrations.RunPython(fill_name_key, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='birthday',
+            index=models.Index(fields=['name_key', 'birthday'], name='birthday_name_key_idx'),
+        ),
+    ]
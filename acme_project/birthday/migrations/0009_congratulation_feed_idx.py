@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('birthday', '0008_birthday_name_key'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='congratulation',
+            index=models.Index(fields=['birthday', 'created_at', 'id'], name='congratulation_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('birthday', '0009_congratulation_feed_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='birthday',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Изменено'),
+        ),
+    ]
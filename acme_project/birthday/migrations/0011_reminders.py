@@ -0,0 +1,48 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:15
+
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('birthday', '0010_birthday_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReminderPreference',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('enabled', models.BooleanField(default=True, verbose_name='Присылать напоминания')),
+                ('days', models.PositiveSmallIntegerField(default=1, help_text='1 — только о завтрашних днях рождения', validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(30)], verbose_name='За сколько дней напоминать')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='reminder_preference', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'настройки напоминаний',
+                'verbose_name_plural': 'Настройки напоминаний',
+            },
+        ),
+        migrations.CreateModel(
+            name='ReminderDigest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='За день')),
+                ('birthdays', models.PositiveIntegerField(verbose_name='Записей в сводке')),
+                ('sent_at', models.DateTimeField(auto_now_add=True, verbose_name='Отправлено')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminder_digests', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'сводка напоминаний',
+                'verbose_name_plural': 'Отправленные сводки напоминаний',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='reminderdigest',
+            constraint=models.UniqueConstraint(fields=('user', 'date'), name='reminder_digest_once_a_day'),
+        ),
+    ]
@@ -1,13 +1,27 @@
+import calendar
+from collections import Counter, defaultdict
+from datetime import date
+
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models import Case, Count, Q, Value, When
+from django.db.models.functions import ExtractMonth
 from django.urls import reverse
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 
+from .utils import (
+    NAME_KEY_MAX_LENGTH, get_month_day, get_month_day_range, make_name_key
+)
 # Импортируем функцию-валидатор.
 from .validators import real_age
 
 # Да, именно так всегда и ссылаемся на модель пользователя!
 User = get_user_model()
 
+# Имя счётчика записей Birthday в core.Counter.
+BIRTHDAY_COUNTER = 'birthday'
+
 
 class Tag(models.Model):
     tag = models.CharField('Тег', max_length=20)
@@ -17,6 +31,143 @@ class Tag(models.Model):
         return self.tag
 
 
+def make_tag_labels(tags):
+    """Строка для поля Birthday.tag_labels из названий тегов."""
+    return ', '.join(tags)
+
+
+class GroupConcat(models.Aggregate):
+    """Склеивает значения группы в одну строку через delimiter."""
+    function = 'GROUP_CONCAT'
+    output_field = models.TextField()
+
+    def __init__(self, expression, delimiter=', ', **extra):
+        super().__init__(expression, Value(delimiter), **extra)
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        # В PostgreSQL та же функция называется STRING_AGG.
+        return self.as_sql(
+            compiler, connection, function='STRING_AGG', **extra_context
+        )
+
+
+class BirthdayQuerySet(models.QuerySet):
+
+    def with_tag_names(self):
+        """
+        Добавляет записям строку tag_names с названиями тегов.
+
+        Теги склеиваются в SQL (GROUP_CONCAT в SQLite) в том же запросе,
+        без отдельного prefetch_related('tags').
+        """
+        return self.annotate(tag_names=GroupConcat('tags__tag'))
+
+    def refresh_tag_labels(self):
+        """Пересчитывает поле tag_labels у записей выборки."""
+        ids = list(self.values_list('pk', flat=True))
+        labels = defaultdict(list)
+        links = Birthday.tags.through.objects.filter(
+            birthday_id__in=ids
+        ).order_by('tag_id').values_list('birthday_id', 'tag__tag')
+        for birthday_id, tag in links:
+            labels[birthday_id].append(tag)
+        # Смена тегов — тоже изменение записи.
+        now = timezone.now()
+        Birthday.objects.bulk_update(
+            [
+                Birthday(
+                    pk=pk,
+                    tag_labels=make_tag_labels(labels[pk]),
+                    updated_at=now,
+                )
+                for pk in ids
+            ],
+            ('tag_labels', 'updated_at'),
+            batch_size=500,
+        )
+
+    def upcoming(self, days, today=None):
+        """
+        Дни рождения в ближайшие days дней, от ближайшего к дальнему.
+
+        Фильтрует по индексу month_day, в том числе когда
+        диапазон переходит через 31 декабря.
+        """
+        if today is None:
+            today = date.today()
+        # month_day у 29 февраля и 1 марта общий: раньше идёт февраль.
+        ordering = ('month_day', ExtractMonth('birthday'), 'id')
+        month_day_range = get_month_day_range(days, today)
+        if month_day_range is None:
+            # Диапазон покрывает весь год: фильтровать нечего.
+            queryset = self
+            start = get_month_day(today)
+        else:
+            start, end = month_day_range
+            if start <= end:
+                return self.filter(
+                    self.get_month_day_condition(start, end, today.year)
+                ).order_by(*ordering)
+            queryset = self.filter(
+                self.get_month_day_condition(start, 1231, today.year)
+                | self.get_month_day_condition(101, end, today.year + 1)
+            )
+        # После 31 декабря сначала идут даты до конца года, затем — с января.
+        return queryset.annotate(
+            next_year=Case(
+                When(month_day__gte=start, then=Value(0)),
+                default=Value(1),
+            )
+        ).order_by('next_year', *ordering)
+
+    @staticmethod
+    def get_month_day_condition(start, end, year):
+        """
+        Условие на дни рождения с ключами от start до end в году year.
+
+        Ключи — по настоящему календарю. month_day хранит 29 февраля
+        как 1 марта, а в високосный год это разные дни: такие записи
+        отделяем по месяцу даты рождения, как в count_by_day().
+        """
+        condition = Q(month_day__range=(start, end))
+        if calendar.isleap(year):
+            feb_29 = Q(month_day=301, birthday__month=2)
+            if start <= 301 <= end:
+                condition &= ~feb_29
+            if start <= 229 <= end:
+                condition |= feb_29
+        return condition
+
+    def count_by_day(self, year, month):
+        """
+        Число дней рождения по дням месяца month года year: {день: число}.
+
+        Один запрос с GROUP BY по month_day и месяцу даты рождения:
+        month_day хранит 29 февраля как 1 марта, а месяц отделяет его.
+        Как и в get_birthday_for_year(), 29 февраля в високосный год
+        остаётся в феврале, а в остальные переезжает на 1 марта.
+        """
+        leap = calendar.isleap(year)
+        start = month * 100
+        condition = Q(month_day__range=(start + 1, start + 31))
+        if month == 2 and leap:
+            condition |= Q(month_day=301, birthday__month=2)
+        rows = self.filter(condition).annotate(
+            birth_month=ExtractMonth('birthday')
+        ).values('month_day', 'birth_month').annotate(
+            total=Count('id')
+        ).order_by()
+        counts = Counter()
+        for row in rows:
+            if (row['month_day'], row['birth_month']) != (301, 2):
+                counts[row['month_day'] % 100] += row['total']
+            elif not leap:
+                counts[1] += row['total']
+            elif month == 2:
+                counts[29] += row['total']
+        return dict(counts)
+
+
 class Birthday(models.Model):
     first_name = models.CharField('Имя', max_length=20)
     last_name = models.CharField(
@@ -33,6 +184,23 @@ class Birthday(models.Model):
         blank=True,
         help_text='Удерживайте Ctrl для выбора нескольких вариантов'
     )
+    # Названия тегов через запятую: список выводит их без запроса к тегам.
+    # Поддерживается сигналом m2m_changed.
+    tag_labels = models.TextField('Теги', blank=True, editable=False)
+    # Нормализованное транслитерированное имя для поиска похожих записей.
+    name_key = models.CharField(
+        'Ключ имени', max_length=NAME_KEY_MAX_LENGTH, blank=True,
+        editable=False,
+    )
+    # Ключ month * 100 + day для поиска ближайших дней рождения по индексу.
+    month_day = models.PositiveSmallIntegerField(
+        'Месяц и день', db_index=True, default=0, editable=False
+    )
+    # Время последнего изменения записи или её тегов: по нему
+    # сбрасываются закешированные строки списка.
+    updated_at = models.DateTimeField('Изменено', auto_now=True)
+
+    objects = BirthdayQuerySet.as_manager()
 
     class Meta:
         constraints = (
@@ -41,7 +209,57 @@ class Birthday(models.Model):
                 name='Unique person constraint',
             ),
         )
-    
+        indexes = (
+            models.Index(
+                fields=('name_key', 'birthday'), name='birthday_name_key_idx'
+            ),
+        )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Дата из БД: при смене даты сигналы сбросят кеш и старого месяца.
+        instance._loaded_birthday = instance.__dict__.get('birthday')
+        return instance
+
+    def fill_derived_fields(self):
+        """
+        Пересчитывает служебные поля из данных записи.
+
+        bulk_create() не вызывает save(), поэтому при массовой
+        вставке этот метод нужно вызвать для каждой записи явно.
+        """
+        self.month_day = get_month_day(self.birthday)
+        self.name_key = make_name_key(self.first_name, self.last_name)
+
+    def save(self, *args, **kwargs):
+        # Служебные поля пересчитываем при каждом сохранении записи.
+        self.fill_derived_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if 'birthday' in update_fields:
+                update_fields.add('month_day')
+            if update_fields & {'first_name', 'last_name'}:
+                update_fields.add('name_key')
+            update_fields.add('updated_at')
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+        # Сигналы уже отработали: следующее сохранение этого объекта
+        # сравнивает дату с сохранённой сейчас, а не с прочитанной из БД.
+        self._loaded_birthday = self.birthday
+
+    def find_similar(self, limit=5):
+        """
+        Похожие записи: с тем же ключом имени и той же датой рождения.
+
+        Ищет по индексу (name_key, birthday), без перебора таблицы.
+        """
+        return Birthday.objects.filter(
+            name_key=make_name_key(self.first_name, self.last_name),
+            birthday=self.birthday,
+        ).exclude(pk=self.pk).order_by('id')[:limit]
+
     def get_absolute_url(self):
         # С помощью функции reverse() возвращаем URL объекта.
         return reverse('birthday:detail', kwargs={'pk': self.pk})
@@ -59,3 +277,56 @@ class Congratulation(models.Model):
 
     class Meta:
         ordering = ('created_at',)
+        indexes = (
+            # Лента поздравлений записи читается порциями по курсору.
+            models.Index(
+                fields=('birthday', 'created_at', 'id'),
+                name='congratulation_feed_idx',
+            ),
+        )
+
+
+class ReminderPreference(models.Model):
+    """Настройки ежедневной рассылки напоминаний автору записей."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='reminder_preference',
+        verbose_name='Пользователь',
+    )
+    enabled = models.BooleanField('Присылать напоминания', default=True)
+    days = models.PositiveSmallIntegerField(
+        'За сколько дней напоминать',
+        default=1,
+        validators=(MinValueValidator(1), MaxValueValidator(30)),
+        help_text='1 — только о завтрашних днях рождения',
+    )
+
+    class Meta:
+        verbose_name = 'настройки напоминаний'
+        verbose_name_plural = 'Настройки напоминаний'
+
+    def __str__(self):
+        return f'{self.user}: {self.days} дн.'
+
+
+class ReminderDigest(models.Model):
+    """Отметка об отправленной дневной сводке: не больше одной в день."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='reminder_digests',
+        verbose_name='Пользователь',
+    )
+    date = models.DateField('За день')
+    birthdays = models.PositiveIntegerField('Записей в сводке')
+    sent_at = models.DateTimeField('Отправлено', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'сводка напоминаний'
+        verbose_name_plural = 'Отправленные сводки напоминаний'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'date'), name='reminder_digest_once_a_day'
+            ),
+        )
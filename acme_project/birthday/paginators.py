@@ -0,0 +1,169 @@
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+from math import ceil
+
+from django.core.paginator import InvalidPage, PageNotAnInteger
+
+
+def encode_cursor(position):
+    """Упаковывает позицию в непрозрачный токен для URL."""
+    data = json.dumps(position, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Распаковывает токен, созданный encode_cursor().
+
+    Для повреждённого токена выбрасывает InvalidPage.
+    """
+    try:
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        position = json.loads(data)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidPage('Некорректный курсор')
+    if not isinstance(position, dict):
+        raise InvalidPage('Некорректный курсор')
+    return position
+
+
+class BasePage(Sequence):
+    """Страница с уже загруженным списком объектов."""
+
+    def __init__(self, object_list, has_next, has_previous):
+        self.object_list = list(object_list)
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+
+class CursorPage(BasePage):
+
+    def __init__(self, object_list, has_next, has_previous, key):
+        super().__init__(object_list, has_next, has_previous)
+        self.next_cursor = None
+        self.previous_cursor = None
+        if has_next:
+            self.next_cursor = encode_cursor(
+                {'after': getattr(self.object_list[-1], key)}
+            )
+        if has_previous:
+            self.previous_cursor = encode_cursor(
+                {'before': getattr(self.object_list[0], key)}
+            )
+
+
+class CursorPaginator:
+    """
+    Пагинация по курсору (keyset): страница выбирается условием
+    key > курсора по индексу, а не OFFSET, и без COUNT(*).
+
+    Поэтому любая страница стоит столько же, сколько первая.
+    """
+
+    def __init__(self, object_list, per_page, key='id'):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.key = key
+
+    def page(self, cursor=None):
+        queryset = self.object_list
+        # Берём на одну запись больше, чтобы узнать, есть ли следующая.
+        limit = self.per_page + 1
+        position = decode_cursor(cursor) if cursor else {}
+        for name in ('before', 'after'):
+            value = position.get(name)
+            # Ключ — id записи; bool тоже int, но курсором быть не может.
+            if name in position and (
+                not isinstance(value, int) or isinstance(value, bool)
+            ):
+                raise InvalidPage('Некорректный курсор')
+        if 'before' in position:
+            rows = list(
+                queryset.filter(**{f'{self.key}__lt': position['before']})
+                .order_by(f'-{self.key}')[:limit]
+            )
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            return CursorPage(rows, True, has_previous, self.key)
+        if 'after' in position:
+            queryset = queryset.filter(
+                **{f'{self.key}__gt': position['after']}
+            )
+        rows = list(queryset.order_by(self.key)[:limit])
+        has_next = len(rows) > self.per_page
+        return CursorPage(
+            rows[:self.per_page], has_next, 'after' in position, self.key
+        )
+
+
+class WindowedPage(BasePage):
+
+    def __init__(self, object_list, number, pages_ahead, has_more, window):
+        super().__init__(object_list, pages_ahead > 1, number > 1)
+        self.number = number
+        # Номера соседних страниц: window назад и сколько нашлось вперёд.
+        self.page_window = range(
+            max(1, number - window), number + pages_ahead
+        )
+        # Есть ли страницы дальше последней показанной.
+        self.has_more = has_more
+
+    def next_page_number(self):
+        return self.number + 1
+
+    def previous_page_number(self):
+        return self.number - 1
+
+
+class WindowedPaginator:
+    """
+    Пагинация по номерам страниц без точного COUNT(*).
+
+    Число записей считается только на window страниц вперёд
+    от текущей — этого хватает, чтобы нарисовать окно ссылок.
+    """
+
+    def __init__(self, object_list, per_page, window=2):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.window = window
+
+    def validate_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('Номер страницы должен быть числом')
+        if number < 1:
+            raise InvalidPage('Номер страницы меньше 1')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        offset = (number - 1) * self.per_page
+        limit = self.per_page * (self.window + 1)
+        # Ограниченный подсчёт: COUNT(*) по подзапросу с LIMIT.
+        ahead = self.object_list[offset:offset + limit + 1].count()
+        if ahead == 0 and number > 1:
+            raise InvalidPage('На этой странице нет записей')
+        pages_ahead = ceil(min(ahead, limit) / self.per_page)
+        rows = self.object_list[offset:offset + self.per_page]
+        return WindowedPage(
+            rows, number, max(pages_ahead, 1), ahead > limit, self.window
+        )
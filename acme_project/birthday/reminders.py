@@ -0,0 +1,130 @@
+"""
+Ежедневные сводки напоминаний авторам о ближайших днях рождения.
+
+Записи для всех авторов выбираются одним запросом по индексу
+month_day, письма собираются в памяти и отправляются через одно
+соединение, отметки пишутся пачками. Отправленная сводка отмечается в
+ReminderDigest, поэтому повторный запуск в тот же день
+досылает только то, что не было отправлено.
+"""
+from datetime import date
+from itertools import groupby
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db.models import Max
+
+from .models import Birthday, ReminderDigest, ReminderPreference
+from .utils import calculate_birthday_countdowns
+
+
+def get_default_days():
+    """Окно напоминаний для авторов без своих настроек."""
+    return getattr(settings, 'BIRTHDAY_REMINDER_DAYS', 1)
+
+
+def get_reminder_birthdays(today):
+    """
+    Записи, о которых пора напомнить, упорядоченные по автору.
+
+    Берёт наибольшее окно из всех настроек и отсекает авторов
+    без почты, с выключенными напоминаниями и с уже отправленной
+    сегодня сводкой — всё в одном запросе.
+    """
+    max_days = ReminderPreference.objects.filter(enabled=True).aggregate(
+        days=Max('days')
+    )['days'] or 0
+    max_days = max(max_days, get_default_days())
+    return Birthday.objects.upcoming(max_days, today).filter(
+        author__is_active=True,
+    ).exclude(
+        author__email='',
+    ).exclude(
+        author__reminder_preference__enabled=False,
+    ).exclude(
+        author__reminder_digests__date=today,
+    ).select_related(
+        'author', 'author__reminder_preference',
+    ).order_by('author_id', 'month_day', 'id')
+
+
+def get_window(author):
+    try:
+        return author.reminder_preference.days
+    except ReminderPreference.DoesNotExist:
+        return get_default_days()
+
+
+def collect_digests(today=None):
+    """
+    Пары (автор, [(дней до ДР, запись), ...]) для сегодняшней рассылки.
+
+    Сегодняшние дни рождения не входят: о них напомнила вчерашняя
+    сводка. Каждому автору — только записи в пределах его окна.
+    """
+    if today is None:
+        today = date.today()
+    birthdays = list(get_reminder_birthdays(today))
+    if not birthdays:
+        return []
+    countdowns = calculate_birthday_countdowns(
+        [birthday.birthday for birthday in birthdays], today
+    )
+    digests = []
+    rows = zip(countdowns.tolist(), birthdays)
+    for _, group in groupby(rows, key=lambda row: row[1].author_id):
+        group = list(group)
+        author = group[0][1].author
+        window = get_window(author)
+        items = sorted(
+            (
+                (countdown, birthday) for countdown, birthday in group
+                if 1 <= countdown <= window
+            ),
+            key=lambda item: item[0],
+        )
+        if items:
+            digests.append((author, items))
+    return digests
+
+
+def format_countdown(countdown):
+    if countdown == 1:
+        return 'завтра'
+    return f'через {countdown} дн.'
+
+
+def make_digest_message(author, items):
+    lines = [
+        f'{birthday.first_name} {birthday.last_name}'.strip()
+        + f' — {format_countdown(countdown)}'
+        + f' ({birthday.birthday:%d.%m})'
+        for countdown, birthday in items
+    ]
+    return EmailMessage(
+        subject=f'Скоро дни рождения: {len(items)}',
+        body=(
+            f'Здравствуйте, {author.get_username()}!\n\n'
+            'Не забудьте поздравить:\n\n' + '\n'.join(lines) + '\n'
+        ),
+        to=[author.email],
+    )
+
+
+def send_digest_batch(batch, connection, today):
+    """
+    Отправляет пачку сводок через одно соединение connection.
+
+    Письма уходят по одному: отменить доставленное нельзя, поэтому
+    отметки пишутся для всех доставленных сводок, даже если отправка
+    упала посреди пачки. Остальные уйдут при следующем запуске.
+    """
+    delivered = []
+    try:
+        for author, items in batch:
+            connection.send_messages([make_digest_message(author, items)])
+            delivered.append(
+                ReminderDigest(user=author, date=today, birthdays=len(items))
+            )
+    finally:
+        ReminderDigest.objects.bulk_create(delivered)
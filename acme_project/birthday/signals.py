@@ -0,0 +1,150 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_delete
+)
+from django.dispatch import Signal, receiver
+
+from core.counters import add_to_counter
+
+from .cache import (
+    invalidate_birthday, invalidate_calendar, invalidate_list, invalidate_tags
+)
+from .models import BIRTHDAY_COUNTER, Birthday, Congratulation, Tag
+from .thumbnails import schedule_thumbnails, thumbnails_exist
+from .utils import get_calendar_months
+
+# bulk_create() не отправляет post_save: массовые вставки отправляют
+# этот сигнал сами. sender — модель, objects — созданные объекты.
+bulk_created = Signal()
+
+
+@receiver(post_save, sender=Birthday)
+def count_created_birthday(sender, instance, created, **kwargs):
+    if created:
+        add_to_counter(BIRTHDAY_COUNTER, 1)
+
+
+@receiver(post_delete, sender=Birthday)
+def count_deleted_birthday(sender, instance, **kwargs):
+    add_to_counter(BIRTHDAY_COUNTER, -1)
+
+
+@receiver(post_save, sender=Birthday)
+@receiver(post_delete, sender=Birthday)
+def invalidate_birthday_cache(sender, instance, **kwargs):
+    invalidate_birthday(instance.pk)
+    invalidate_list()
+
+
+@receiver(post_save, sender=Birthday)
+@receiver(post_delete, sender=Birthday)
+def invalidate_calendar_cache(sender, instance, **kwargs):
+    months = get_calendar_months(instance.birthday)
+    loaded = getattr(instance, '_loaded_birthday', None)
+    if loaded is not None and loaded != instance.birthday:
+        # Дату перенесли: запись пропала и из прежнего месяца.
+        months |= get_calendar_months(loaded)
+    invalidate_calendar(months)
+
+
+@receiver(post_save, sender=Congratulation)
+@receiver(post_delete, sender=Congratulation)
+def invalidate_congratulation_cache(sender, instance, **kwargs):
+    invalidate_birthday(instance.birthday_id)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_author_cache(
+    sender, instance, created, update_fields, **kwargs
+):
+    if created:
+        return
+    if update_fields is not None and 'username' not in update_fields:
+        # Например, обновление last_login при входе.
+        return
+    # Имя пользователя выводится в списке у его записей
+    # и на страницах записей, которые он поздравил.
+    invalidate_list()
+    birthday_ids = Congratulation.objects.filter(
+        author=instance
+    ).values_list('birthday_id', flat=True).distinct()
+    for pk in birthday_ids:
+        invalidate_birthday(pk)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tag_cache(sender, instance, **kwargs):
+    # Названия тегов выводятся только в списке.
+    invalidate_list()
+    # Индексы поиска тегов перестроятся при следующем поиске.
+    invalidate_tags()
+
+
+@receiver(m2m_changed, sender=Birthday.tags.through)
+def invalidate_birthday_tags_cache(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        invalidate_birthday(instance.pk)
+    elif pk_set:
+        # Связи меняли со стороны тега: pk_set — это id записей.
+        for pk in pk_set:
+            invalidate_birthday(pk)
+    invalidate_list()
+
+
+@receiver(post_save, sender=Birthday)
+def create_thumbnails(sender, instance, update_fields, **kwargs):
+    if not instance.image:
+        return
+    if update_fields is not None and 'image' not in update_fields:
+        return
+    if not thumbnails_exist(instance.image):
+        # Файл копируется в хранилище при сохранении — после коммита
+        # он точно на месте, а ответ на запрос не ждёт пересжатия.
+        image = instance.image
+        transaction.on_commit(lambda: schedule_thumbnails(image))
+
+
+@receiver(m2m_changed, sender=Birthday.tags.through)
+def update_tag_labels(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == 'pre_clear':
+        # Связи тега очищаются: запоминаем записи, пока они известны.
+        instance._cleared_birthday_ids = list(
+            instance.birthday_set.values_list('pk', flat=True)
+        )
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        birthday_ids = [instance.pk]
+    elif action == 'post_clear':
+        birthday_ids = instance._cleared_birthday_ids
+    else:
+        birthday_ids = pk_set
+    Birthday.objects.filter(pk__in=birthday_ids).refresh_tag_labels()
+
+
+@receiver(post_save, sender=Tag)
+def update_renamed_tag_labels(sender, instance, created, **kwargs):
+    if not created:
+        instance.birthday_set.all().refresh_tag_labels()
+
+
+@receiver(pre_delete, sender=Tag)
+def remember_tag_birthdays(sender, instance, **kwargs):
+    # После удаления тега его связей уже не найти.
+    instance._deleted_birthday_ids = list(
+        instance.birthday_set.values_list('pk', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Tag)
+def update_deleted_tag_labels(sender, instance, **kwargs):
+    Birthday.objects.filter(
+        pk__in=instance._deleted_birthday_ids
+    ).refresh_tag_labels()
@@ -0,0 +1,60 @@
+"""
+Индекс названий тегов в памяти процесса для поиска по префиксу.
+
+Индекс — отсортированный без учёта регистра список названий
+и параллельный ему список ключей casefold(), поиск — бинарный
+(bisect) по ключам. Версия индекса хранится в общем кеше:
+сигналы Tag её увеличивают, и каждый процесс перестраивает
+свой индекс при первом поиске после изменения.
+"""
+import threading
+from bisect import bisect_left
+
+from .cache import get_tags_version
+from .models import Tag
+
+SEARCH_LIMIT = 20
+
+
+class TagIndex:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._keys = []
+        self._names = []
+        self._ids = []
+
+    def _refresh(self):
+        version = get_tags_version()
+        if version == self._version:
+            return
+        with self._lock:
+            if version == self._version:
+                return
+            tags = sorted(
+                Tag.objects.values_list('tag', 'id'),
+                key=lambda tag: tag[0].casefold(),
+            )
+            self._keys = [name.casefold() for name, _ in tags]
+            self._names = [name for name, _ in tags]
+            self._ids = [pk for _, pk in tags]
+            self._version = version
+
+    def search(self, prefix, limit=SEARCH_LIMIT):
+        """Теги, чьё название начинается с prefix: список пар (id, name)."""
+        self._refresh()
+        prefix = prefix.strip().casefold()
+        if not prefix:
+            return []
+        keys, names, ids = self._keys, self._names, self._ids
+        start = bisect_left(keys, prefix)
+        results = []
+        for index in range(start, min(start + limit, len(keys))):
+            if not keys[index].startswith(prefix):
+                break
+            results.append((ids[index], names[index]))
+        return results
+
+
+tag_index = TagIndex()
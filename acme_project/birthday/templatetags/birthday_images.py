@@ -0,0 +1,11 @@
+from django import template
+
+from birthday.thumbnails import get_thumbnail_url
+
+register = template.Library()
+
+
+@register.simple_tag
+def thumbnail_url(image, height):
+    """URL уменьшенной копии фото, подходящей для высоты height."""
+    return get_thumbnail_url(image, int(height))
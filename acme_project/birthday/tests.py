@@ -0,0 +1,798 @@
+import csv
+import json
+import os
+import shutil
+import tempfile
+from datetime import date, timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import CommandError, call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from core.models import Counter
+from core.testing import QueryBudgetMixin
+from stats.models import BirthYearStat, TagStat
+
+from .models import (
+    BIRTHDAY_COUNTER, Birthday, Congratulation, ReminderDigest,
+    ReminderPreference, Tag
+)
+from .export import iter_export
+from .paginators import encode_cursor
+from .tag_index import tag_index
+from .thumbnails import (
+    get_thumbnail_url, make_thumbnails, thumbnails_exist
+)
+from .utils import NAME_KEY_MAX_LENGTH, make_name_key
+
+User = get_user_model()
+
+
+class AuthorViewsQueriesTest(TestCase):
+    """Число запросов у страниц, доступных только автору записи."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author')
+        cls.reader = User.objects.create_user('reader')
+        cls.birthday = Birthday.objects.create(
+            first_name='Иван',
+            last_name='Иванов',
+            birthday=date(1990, 5, 17),
+            author=cls.author,
+        )
+        cls.edit_url = reverse('birthday:edit', args=(cls.birthday.pk,))
+        cls.delete_url = reverse('birthday:delete', args=(cls.birthday.pk,))
+        cls.comment_url = reverse(
+            'birthday:add_comment', args=(cls.birthday.pk,)
+        )
+
+    def setUp(self):
+        self.client.force_login(self.author)
+
+    def test_edit_page(self):
+        # Сессия, пользователь, запись, её теги.
+        with self.assertNumQueries(4):
+            response = self.client.get(self.edit_url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_delete_page(self):
+        # Сессия, пользователь, запись.
+        with self.assertNumQueries(3):
+            response = self.client.get(self.delete_url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_edit_and_delete_for_other_user(self):
+        self.client.force_login(self.reader)
+        for url in (self.edit_url, self.delete_url):
+            with self.subTest(url=url):
+                # Сессия, пользователь и один запрос с условием на автора.
+                with self.assertNumQueries(3):
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 404)
+
+    def test_edit(self):
+        data = {
+            'first_name': 'Пётр',
+            'last_name': 'Иванов',
+            'birthday': '1990-05-17',
+            'confirm_duplicate': 'on',
+        }
+        # Сессия, пользователь, запись, её теги, проверка уникальности,
+        # обновление записи, сверка тегов перед их сохранением.
+        with self.assertNumQueries(7):
+            response = self.client.post(self.edit_url, data)
+        self.assertEqual(response.status_code, 302)
+        self.birthday.refresh_from_db()
+        self.assertEqual(self.birthday.first_name, 'Пётр')
+
+    def test_delete(self):
+        # Сессия, пользователь, запись, поздравления для каскада,
+        # теги для статистики, связи с тегами, сама запись,
+        # счётчик записей, статистика по году и месяцу рождения.
+        with self.assertNumQueries(10):
+            response = self.client.post(self.delete_url)
+        self.assertRedirects(response, reverse('birthday:list'))
+        self.assertFalse(Birthday.objects.exists())
+
+    def test_add_comment(self):
+        # Первое за день поздравление создаёт строку статистики.
+        self.client.post(self.comment_url, {'text': 'Привет!'})
+        # Сессия, пользователь, проверка записи, вставка поздравления,
+        # статистика за день.
+        with self.assertNumQueries(5):
+            response = self.client.post(self.comment_url, {'text': 'Ура!'})
+        self.assertRedirects(
+            response,
+            reverse('birthday:detail', args=(self.birthday.pk,)),
+            fetch_redirect_response=False,
+        )
+        self.assertTrue(
+            Congratulation.objects.filter(
+                birthday=self.birthday, author=self.author
+            ).exists()
+        )
+
+    def test_add_comment_to_missing_birthday(self):
+        url = reverse('birthday:add_comment', args=(self.birthday.pk + 1,))
+        with self.assertNumQueries(3):
+            response = self.client.post(url, {'text': 'Ура!'})
+        self.assertEqual(response.status_code, 404)
+
+
+class AddCongratulationsTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('user')
+        cls.birthdays = Birthday.objects.bulk_create(
+            Birthday(
+                first_name=f'Имя{number}',
+                last_name='Фамилия',
+                birthday=date(1990, 1, number),
+            )
+            for number in range(1, 4)
+        )
+        cls.url = reverse('birthday:add_congratulations')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def post(self, payload):
+        return self.client.post(
+            self.url, json.dumps(payload), content_type='application/json'
+        )
+
+    def test_batch(self):
+        items = [
+            {'birthday': birthday.pk, 'text': f'Поздравляю {number}'}
+            for number in range(10)
+            for birthday in self.birthdays
+        ]
+        items.insert(3, {'birthday': 0, 'text': 'Нет записи'})
+        items.insert(5, {'birthday': self.birthdays[0].pk, 'text': ''})
+        # Сессия, пользователь, проверка записей, вставка пачки
+        # и статистика за день: UPDATE без строки, затем её вставка
+        # (в тесте транзакции — это SAVEPOINT вокруг пачки и вокруг
+        # вставки строки).
+        with self.assertNumQueries(10):
+            response = self.post({'congratulations': items})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(len(data['accepted']), 30)
+        self.assertEqual(
+            [item['index'] for item in data['rejected']], [3, 5]
+        )
+        self.assertIn('birthday', data['rejected'][0]['errors'])
+        self.assertIn('text', data['rejected'][1]['errors'])
+        self.assertEqual(Congratulation.objects.count(), 30)
+
+    def test_bad_payload(self):
+        for payload in ({}, {'congratulations': 'текст'}):
+            with self.subTest(payload=payload):
+                self.assertEqual(self.post(payload).status_code, 400)
+
+    def test_session_and_csrf_required(self):
+        payload = json.dumps({'congratulations': []})
+        self.client.logout()
+        response = self.client.post(
+            self.url, payload, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 302)
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        response = client.post(
+            self.url, payload, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 403)
+        client.get(reverse('birthday:list'))
+        response = client.post(
+            self.url, payload, content_type='application/json',
+            HTTP_X_CSRFTOKEN=client.cookies['csrftoken'].value,
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+class BirthdayRemindersTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = date(2024, 12, 30)
+        cls.author = User.objects.create_user('author', 'author@example.com')
+        cls.planner = User.objects.create_user(
+            'planner', 'planner@example.com'
+        )
+        ReminderPreference.objects.create(user=cls.planner, days=7)
+        no_email = User.objects.create_user('no_email')
+        for number, (user, days) in enumerate((
+            (cls.author, 0), (cls.author, 1), (cls.author, 2),
+            (cls.planner, 1), (cls.planner, 3), (cls.planner, 8),
+            (no_email, 1),
+        )):
+            Birthday.objects.create(
+                first_name=f'Имя{number}',
+                birthday=(cls.today + timedelta(days=days)).replace(
+                    year=1990
+                ),
+                author=user,
+            )
+
+    def send(self):
+        call_command(
+            'send_birthday_reminders', date=self.today, batch_size=1,
+            stdout=StringIO(),
+        )
+
+    def test_digests(self):
+        self.send()
+        messages = {message.to[0]: message for message in mail.outbox}
+        self.assertEqual(
+            sorted(messages), ['author@example.com', 'planner@example.com']
+        )
+        # Автору — только завтрашние, второму — на неделю вперёд,
+        # через Новый год.
+        self.assertIn('Имя1 — завтра', messages['author@example.com'].body)
+        self.assertNotIn('Имя2', messages['author@example.com'].body)
+        body = messages['planner@example.com'].body
+        self.assertIn('Имя3 — завтра (31.12)', body)
+        self.assertIn('Имя4 — через 3 дн. (02.01)', body)
+        self.assertNotIn('Имя5', body)
+
+    def test_once_a_day(self):
+        self.send()
+        self.send()
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(ReminderDigest.objects.count(), 2)
+
+    def test_failed_midway(self):
+        # Первое письмо пачки ушло, на втором соединение оборвалось.
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.send_messages',
+            side_effect=[1, OSError('connection lost')],
+        ):
+            with self.assertRaisesMessage(CommandError, '1 из 2'):
+                call_command(
+                    'send_birthday_reminders', date=self.today,
+                    stdout=StringIO(),
+                )
+        self.assertEqual(
+            list(ReminderDigest.objects.values_list(
+                'user__username', flat=True
+            )),
+            ['author'],
+        )
+        # Повторный запуск досылает только недоставленную сводку.
+        self.send()
+        self.assertEqual(
+            [message.to for message in mail.outbox],
+            [['planner@example.com']],
+        )
+
+
+class CalendarTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for number, birthday in enumerate((
+            date(2000, 2, 29), date(1990, 3, 1), date(1990, 3, 1),
+            date(1985, 2, 10),
+        )):
+            Birthday.objects.create(
+                first_name=f'Имя{number}', birthday=birthday
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feb_29(self):
+        # В високосный год 29 февраля — в феврале, иначе — 1 марта.
+        self.assertEqual(
+            Birthday.objects.count_by_day(2024, 2), {10: 1, 29: 1}
+        )
+        self.assertEqual(Birthday.objects.count_by_day(2024, 3), {1: 2})
+        self.assertEqual(Birthday.objects.count_by_day(2025, 2), {10: 1})
+        self.assertEqual(Birthday.objects.count_by_day(2025, 3), {1: 3})
+
+    def test_cache_and_etag(self):
+        url = reverse('birthday:calendar_month', args=(2025, 3))
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertContains(response, 'Дней рождения в этом месяце: 3')
+        self.assertEqual(response['Vary'], 'Cookie')
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            self.client.get(url)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        # Перенос даты сбрасывает и прежний, и новый месяц.
+        birthday = Birthday.objects.get(first_name='Имя1')
+        birthday.birthday = date(1990, 4, 1)
+        birthday.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Дней рождения в этом месяце: 2')
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_upcoming_leap_year(self):
+        def names(days, today):
+            return [
+                birthday.first_name
+                for birthday in Birthday.objects.upcoming(days, today)
+            ]
+
+        # В високосный год 29 февраля и 1 марта — разные дни.
+        self.assertEqual(names(1, date(2024, 2, 28)), ['Имя0'])
+        self.assertEqual(names(0, date(2024, 2, 29)), ['Имя0'])
+        self.assertEqual(names(0, date(2024, 3, 1)), ['Имя1', 'Имя2'])
+        self.assertEqual(
+            names(2, date(2024, 2, 28)), ['Имя0', 'Имя1', 'Имя2']
+        )
+        self.assertEqual(names(60, date(2023, 12, 31)), ['Имя3', 'Имя0'])
+        # В невисокосный — 29 февраля празднуют 1 марта.
+        self.assertEqual(names(1, date(2025, 2, 27)), [])
+        self.assertEqual(
+            names(0, date(2025, 3, 1)), ['Имя0', 'Имя1', 'Имя2']
+        )
+
+    def test_saved_twice(self):
+        # Второе сохранение сбрасывает месяц, куда запись попала первым.
+        birthday = Birthday.objects.get(first_name='Имя3')
+        april = reverse('birthday:calendar_month', args=(2025, 4))
+        birthday.birthday = date(1985, 4, 10)
+        birthday.save()
+        response = self.client.get(april)
+        self.assertContains(response, 'Дней рождения в этом месяце: 1')
+        birthday.birthday = date(1985, 5, 10)
+        birthday.save()
+        response = self.client.get(april)
+        self.assertContains(response, 'Дней рождения в этом месяце: 0')
+
+    def test_bad_month(self):
+        url = reverse('birthday:calendar_month', args=(2025, 13))
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class PageQueryBudgetTest(QueryBudgetMixin, TestCase):
+    """Число запросов не растёт с числом записей, авторов и тегов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        users = [
+            User.objects.create_user(f'user{number}') for number in range(5)
+        ]
+        cls.user = users[0]
+        tags = Tag.objects.bulk_create(
+            Tag(tag=f'тег{number}') for number in range(5)
+        )
+        for number in range(15):
+            birthday = Birthday.objects.create(
+                first_name=f'Имя{number}',
+                last_name='Фамилия',
+                birthday=date(1990, 1, number + 1),
+                author=users[number % len(users)],
+            )
+            birthday.tags.set(tags[:number % len(tags) + 1])
+        cls.birthday = birthday
+        Congratulation.objects.bulk_create(
+            Congratulation(
+                birthday=birthday,
+                author=users[number % len(users)],
+                text=f'Поздравление {number}',
+            )
+            for number in range(30)
+        )
+
+    def setUp(self):
+        # Проверяем страницы без кеша: так, как их строит первый запрос.
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_list(self):
+        # Сессия, пользователь, страница записей с авторами.
+        self.assertQueryBudget(reverse('birthday:list'), 3)
+
+    def test_detail(self):
+        # Сессия, пользователь, запись, первая порция поздравлений.
+        self.assertQueryBudget(
+            reverse('birthday:detail', args=(self.birthday.pk,)), 4
+        )
+
+
+class ListRowCacheTest(TestCase):
+    """Строки списка из кеша не показывают устаревшие данные."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author')
+        birthday = Birthday.objects.create(
+            first_name='Иван', birthday=date(1990, 5, 17), author=cls.author
+        )
+        birthday.tags.add(Tag.objects.create(tag='друзья'))
+
+    def setUp(self):
+        cache.clear()
+
+    def test_author_renamed(self):
+        url = reverse('birthday:list')
+        self.assertContains(self.client.get(url), 'пользователя author')
+        self.author.username = 'renamed'
+        self.author.save()
+        response = self.client.get(url)
+        self.assertContains(response, 'пользователя renamed')
+        self.assertNotContains(response, 'пользователя author')
+
+    def test_congratulation_author_renamed(self):
+        birthday = Birthday.objects.get()
+        birthday.congratulations.create(author=self.author, text='Ура')
+        url = reverse('birthday:detail', args=(birthday.pk,))
+        self.assertContains(self.client.get(url), 'author')
+        self.author.username = 'renamed'
+        self.author.save()
+        self.assertContains(self.client.get(url), 'renamed')
+
+
+class TagSearchTest(TestCase):
+    """Поиск тегов по префиксу и виджет выбора тегов в форме."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author')
+        cls.tags = Tag.objects.bulk_create(
+            Tag(tag=name) for name in ('Друзья', 'дача', 'работа', 'ДРУГ')
+        )
+        cls.birthday = Birthday.objects.create(
+            first_name='Иван', birthday=date(1990, 5, 17), author=cls.author
+        )
+        cls.birthday.tags.add(cls.tags[2])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_prefix(self):
+        self.assertEqual(
+            [name for _, name in tag_index.search(' ДР ')], ['ДРУГ', 'Друзья']
+        )
+        self.assertEqual(len(tag_index.search('д', limit=2)), 2)
+        self.assertEqual(tag_index.search('ф'), [])
+        self.assertEqual(tag_index.search(''), [])
+        # Новый тег виден после сброса версии индекса сигналом.
+        tag = Tag.objects.create(tag='футбол')
+        self.assertEqual(tag_index.search('ф'), [(tag.pk, 'футбол')])
+
+    def test_view(self):
+        url = reverse('birthday:tag_search')
+        self.client.force_login(self.author)
+        response = self.client.get(url, {'q': 'раб'})
+        self.assertEqual(
+            response.json(),
+            {'results': [{'id': self.tags[2].pk, 'text': 'работа'}]},
+        )
+
+    def test_widget(self):
+        self.client.force_login(self.author)
+        response = self.client.get(
+            reverse('birthday:edit', args=(self.birthday.pk,))
+        )
+        self.assertContains(response, reverse('birthday:tag_search'))
+        # В <select> только выбранный тег, остальные — через поиск.
+        self.assertContains(response, '<option value=', count=1)
+        self.assertContains(response, 'работа')
+        self.assertNotContains(response, 'Друзья')
+
+
+class TamperedCursorTest(TestCase):
+    """Подделанный курсор — это 404 или 400, а не ошибка сервера."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.birthday = Birthday.objects.create(
+            first_name='Иван', birthday=date(1990, 5, 17)
+        )
+
+    @override_settings(BIRTHDAY_LIST_PAGINATION='cursor')
+    def test_list(self):
+        url = reverse('birthday:list')
+        for position in ({'after': 'x'}, {'before': [1]}, {'after': None},
+                         {'after': True}):
+            with self.subTest(position=position):
+                response = self.client.get(
+                    url, {'cursor': encode_cursor(position)}
+                )
+                self.assertEqual(response.status_code, 404)
+
+    def test_cursor_by_default(self):
+        # Без настройки список тоже постраничный по курсору.
+        with self.settings():
+            del settings.BIRTHDAY_LIST_PAGINATION
+            response = self.client.get(
+                reverse('birthday:list'), {'cursor': 'x'}
+            )
+        self.assertEqual(response.status_code, 404)
+
+    def test_congratulations(self):
+        url = reverse('birthday:congratulations', args=(self.birthday.pk,))
+        moment = '2024-01-01T00:00:00+00:00'
+        for position in (
+            {'after': [moment, 'x']}, {'after': [moment, [1]]},
+            {'after': [moment, None]}, {'after': ['вчера', 1]},
+        ):
+            with self.subTest(position=position):
+                response = self.client.get(
+                    url, {'after': encode_cursor(position)}
+                )
+                self.assertEqual(response.status_code, 400)
+
+
+class ThumbnailsTest(TestCase):
+    """Копии не крупнее оригинала не создаются и не ожидаются."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def save_image(self, height):
+        content = BytesIO()
+        Image.new('RGB', (height, height)).save(content, format='JPEG')
+        name = default_storage.save(
+            'birthdays_images/photo.jpg', ContentFile(content.getvalue())
+        )
+        return Birthday(image=name).image
+
+    def test_small_image(self):
+        image = self.save_image(150)
+        self.assertFalse(thumbnails_exist(image))
+        self.assertEqual(len(make_thumbnails(image.path)), 1)
+        self.assertTrue(thumbnails_exist(image))
+        # Временных файлов не остаётся.
+        self.assertEqual(
+            sorted(os.listdir(os.path.dirname(image.path))),
+            ['photo.jpg', 'photo_h100.jpg'],
+        )
+
+    def test_tiny_image(self):
+        image = self.save_image(80)
+        self.assertTrue(thumbnails_exist(image))
+        self.assertEqual(make_thumbnails(image.path), [])
+
+    def test_url_cached(self):
+        cache.clear()
+        image = self.save_image(300)
+        self.assertEqual(get_thumbnail_url(image, 100), image.url)
+        make_thumbnails(image.path)
+        # «Копии нет» запомнено ненадолго.
+        self.assertEqual(get_thumbnail_url(image, 100), image.url)
+        cache.clear()
+        url = get_thumbnail_url(image, 100)
+        self.assertTrue(url.endswith('photo_h100.jpg'))
+        with mock.patch.object(image.storage, 'exists') as exists:
+            self.assertEqual(get_thumbnail_url(image, 100), url)
+            self.assertTrue(
+                get_thumbnail_url(image, 150).endswith('photo_h200.jpg')
+            )
+        # Хранилище проверялось только для новой высоты.
+        self.assertEqual(exists.call_count, 1)
+
+
+class DuplicateBirthdayTest(TestCase):
+    """Похожие записи находятся по ключу имени и дате рождения."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author')
+        cls.birthday = Birthday.objects.create(
+            first_name='Наталья', last_name='Иванова',
+            birthday=date(1990, 5, 17), author=cls.author,
+        )
+
+    def test_name_key(self):
+        self.assertEqual(
+            make_name_key('Наталья', 'Иванова'),
+            make_name_key(' natalya', 'IVANOVA '),
+        )
+        self.assertEqual(make_name_key('Юлия', ''), make_name_key('Yulia', ''))
+        self.assertEqual(make_name_key('Юлия', ''), 'iulia')
+        # Транслитерация удлиняет имя, но ключ помещается в поле.
+        self.assertEqual(
+            len(make_name_key('Щ' * 20, 'Щ' * 20)), NAME_KEY_MAX_LENGTH
+        )
+
+    def test_find_similar(self):
+        candidate = Birthday(
+            first_name='Natalia', last_name='Ivanova',
+            birthday=date(1990, 5, 17),
+        )
+        self.assertEqual(list(candidate.find_similar()), [self.birthday])
+        candidate.birthday = date(1990, 5, 18)
+        self.assertEqual(list(candidate.find_similar()), [])
+        # Сама запись себе не дубликат.
+        self.assertEqual(list(self.birthday.find_similar()), [])
+
+    def test_form(self):
+        self.client.force_login(self.author)
+        data = {
+            'first_name': 'Natalya', 'last_name': 'Ivanova',
+            'birthday': '1990-05-17',
+        }
+        url = reverse('birthday:create')
+        response = self.client.post(url, data)
+        self.assertContains(response, 'Похоже, такая запись уже есть')
+        self.assertEqual(Birthday.objects.count(), 1)
+        response = self.client.post(url, {**data, 'confirm_duplicate': 'on'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Birthday.objects.count(), 2)
+
+    def test_command(self):
+        Birthday.objects.create(
+            first_name='Natalia', last_name='Ivanova',
+            birthday=date(1990, 5, 17),
+        )
+        Birthday.objects.update(name_key='')
+        out = StringIO()
+        call_command('find_duplicate_birthdays', '--backfill', stdout=out)
+        self.assertIn('Ключ имени обновлён у записей: 2', out.getvalue())
+        self.assertIn('Групп похожих записей: 1', out.getvalue())
+        self.assertIn(f'#{self.birthday.pk} Наталья Иванова', out.getvalue())
+
+
+class ImportBirthdaysTest(TestCase):
+    """Импорт записей из CSV и JSONL."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author')
+        cls.tag = Tag.objects.create(tag='друзья')
+        Counter.objects.create(name=BIRTHDAY_COUNTER, value=0)
+
+    def import_file(self, content, suffix='.csv', *args):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, f'birthdays{suffix}')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        out, err = StringIO(), StringIO()
+        call_command(
+            'import_birthdays', path, '--author', 'author', *args,
+            stdout=out, stderr=err,
+        )
+        return out.getvalue(), err.getvalue()
+
+    def test_csv(self):
+        out, err = self.import_file(
+            'first_name,last_name,birthday,tags\n'
+            'Иван,Иванов,1990-05-17,друзья;работа\n'
+            'Пётр,,1985-01-02,\n'
+        )
+        self.assertIn('добавлено: 2', out)
+        self.assertEqual(err, '')
+        ivan = Birthday.objects.get(first_name='Иван')
+        self.assertEqual(ivan.author, self.author)
+        # Связи с тегами вставлены по id, полученным из bulk_create().
+        self.assertEqual(
+            sorted(ivan.tags.values_list('tag', flat=True)),
+            ['друзья', 'работа'],
+        )
+        self.assertEqual(ivan.tag_labels, 'друзья, работа')
+        self.assertEqual(ivan.month_day, 517)
+        self.assertEqual(
+            Counter.objects.get(name=BIRTHDAY_COUNTER).value, 2
+        )
+        self.assertEqual(BirthYearStat.objects.get(year=1990).count, 1)
+        self.assertEqual(TagStat.objects.get(tag=self.tag).count, 1)
+
+    def test_jsonl(self):
+        out, _ = self.import_file(
+            '{"first_name": "Анна", "birthday": "1992-02-29", '
+            '"tags": ["друзья"]}\n',
+            '.jsonl',
+        )
+        self.assertIn('добавлено: 1', out)
+        anna = Birthday.objects.get(first_name='Анна')
+        self.assertEqual(list(anna.tags.all()), [self.tag])
+        self.assertEqual(anna.month_day, 301)
+
+    def test_bad_rows(self):
+        Birthday.objects.create(
+            first_name='Иван', last_name='Иванов', birthday=date(1990, 5, 17)
+        )
+        out, err = self.import_file(
+            'first_name,last_name,birthday,tags,author\n'
+            'Иван,Иванов,1990-05-17,,\n'
+            'Пётр,,не дата,,\n'
+            'Джон,Леннон,1940-10-09,,\n'
+            'Анна,,1992-03-01,,nobody\n'
+            'Ольга,,1993-04-05,,\n'
+        )
+        self.assertIn('добавлено: 1, с ошибками: 3, уже были в базе: 1', out)
+        self.assertIn('Строка 3:', err)
+        self.assertIn("Строка 5: Нет пользователя 'nobody'", err)
+        # Запись, созданная в тесте, и одна импортированная.
+        self.assertEqual(
+            Counter.objects.get(name=BIRTHDAY_COUNTER).value, 2
+        )
+        self.assertFalse(Birthday.objects.filter(first_name='Джон').exists())
+
+
+class ExportBirthdaysTest(TestCase):
+    """Потоковая выгрузка записей в CSV и JSONL."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author')
+        other = User.objects.create_user('other')
+        tags = [Tag.objects.create(tag=f'тег{number}') for number in range(3)]
+        for number in range(5):
+            birthday = Birthday.objects.create(
+                first_name=f'Имя{number}', birthday=date(1990, 1, number + 1),
+                author=cls.author,
+            )
+            birthday.tags.set(tags[:number % 3 + 1])
+        Birthday.objects.create(
+            first_name='Чужая', birthday=date(1990, 2, 1), author=other
+        )
+        cls.url = reverse('birthday:export')
+
+    def setUp(self):
+        self.client.force_login(self.author)
+
+    def get_content(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv(self):
+        rows = list(csv.DictReader(StringIO(self.get_content())))
+        # Только записи самого пользователя.
+        self.assertEqual(
+            [row['first_name'] for row in rows],
+            [f'Имя{number}' for number in range(5)],
+        )
+        self.assertEqual(rows[2]['tags'], 'тег0;тег1;тег2')
+        self.assertEqual(rows[2]['birthday'], '1990-01-03')
+        self.assertEqual(rows[2]['author'], 'author')
+
+    def test_jsonl(self):
+        rows = [
+            json.loads(line)
+            for line in self.get_content(format='jsonl').splitlines()
+        ]
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[1]['tags'], ['тег0', 'тег1'])
+
+    def test_filters(self):
+        content = self.get_content(
+            format='jsonl', date_from='1990-01-02', date_to='1990-01-03'
+        )
+        self.assertEqual(len(content.splitlines()), 2)
+        for params in ({'format': 'xml'}, {'date_from': '1990-13-01'}):
+            with self.subTest(params=params):
+                response = self.client.get(self.url, params)
+                self.assertEqual(response.status_code, 400)
+
+    def test_tags_per_chunk(self):
+        # Записи читаются одним запросом, теги — по запросу на чанк,
+        # а не на каждую запись.
+        lines = iter_export(Birthday.objects.all(), 'jsonl', chunk_size=2)
+        with self.assertNumQueries(1 + 3):
+            self.assertEqual(len(list(lines)), 6)
+
+    def test_command(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'birthdays.csv')
+        call_command('export_birthdays', '--output', path)
+        with open(path, encoding='utf-8') as file:
+            rows = list(csv.DictReader(file))
+        # Команда выгружает записи всех авторов.
+        self.assertEqual(len(rows), 6)
@@ -0,0 +1,169 @@
+"""
+Уменьшенные копии фотографий Birthday.image.
+
+Копии лежат рядом с оригиналом: birthdays_images/photo.jpg ->
+birthdays_images/photo_h100.jpg. Их создаёт пул процессов,
+поэтому запрос с загрузкой фото не ждёт пересжатия.
+"""
+import hashlib
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from PIL import ExifTags, Image, ImageOps
+
+# Высоты копий: 100px — для списка, 200px — для страницы записи.
+THUMBNAIL_HEIGHTS = (100, 200)
+# Значения EXIF Orientation, при которых фото повёрнуто на 90°.
+ROTATED_ORIENTATIONS = (5, 6, 7, 8)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_thumbnail_name(name, height):
+    """Имя файла копии высотой height для оригинала name."""
+    root, ext = os.path.splitext(name)
+    return f'{root}_h{height}{ext}'
+
+
+def get_thumbnail_heights(image_height, heights=THUMBNAIL_HEIGHTS):
+    """Высоты копий, которые нужны оригиналу высотой image_height."""
+    return [height for height in heights if height < image_height]
+
+
+def make_thumbnails(path, heights=THUMBNAIL_HEIGHTS):
+    """
+    Создаёт копии файла path нужных высот и возвращает их пути.
+
+    Выполняется в процессе пула, поэтому работает только с файлами
+    и не обращается к БД. Копии не крупнее оригинала не создаются.
+    """
+    created = []
+    # Права копий — как у оригинала: временный файл создаётся с 0600.
+    mode = os.stat(path).st_mode & 0o777
+    with Image.open(path) as image:
+        image_format = image.format
+        # Учитываем поворот из EXIF, иначе фото с телефона лягут набок.
+        image = ImageOps.exif_transpose(image)
+        for height in get_thumbnail_heights(image.height, heights):
+            width = max(1, round(image.width * height / image.height))
+            thumbnail = image.resize((width, height), Image.LANCZOS)
+            target = get_thumbnail_name(path, height)
+            ext = os.path.splitext(target)[1]
+            if ext.lower() in ('.jpg', '.jpeg') and thumbnail.mode != 'RGB':
+                thumbnail = thumbnail.convert('RGB')
+            # Пишем во временный файл с уникальным именем и подменяем
+            # атомарно: шаблон не должен увидеть недописанную копию,
+            # а два процесса с одним фото — писать в один файл.
+            temporary = tempfile.NamedTemporaryFile(
+                dir=os.path.dirname(target), suffix=ext, delete=False
+            )
+            try:
+                with temporary:
+                    thumbnail.save(temporary, format=image_format)
+                os.chmod(temporary.name, mode)
+                os.replace(temporary.name, target)
+            except BaseException:
+                os.unlink(temporary.name)
+                raise
+            created.append(target)
+    return created
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn, а не fork: дочерние процессы не наследуют
+            # потоки и соединения с БД веб-сервера.
+            _executor = ProcessPoolExecutor(
+                max_workers=getattr(settings, 'THUMBNAIL_WORKERS', 2),
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _executor
+
+
+def schedule_thumbnails(image):
+    """Ставит создание копий для файла image в очередь пула процессов."""
+    return get_executor().submit(make_thumbnails, image.path)
+
+
+def get_image_height(image):
+    """
+    Высота оригинала image с учётом поворота из EXIF.
+
+    Читает только заголовок файла. None — если файл не прочитать.
+    """
+    try:
+        with image.storage.open(image.name) as file:
+            with Image.open(file) as picture:
+                exif = picture.getexif()
+                if exif.get(ExifTags.Base.Orientation) in ROTATED_ORIENTATIONS:
+                    return picture.width
+                return picture.height
+    except OSError:
+        return None
+
+
+def thumbnails_exist(image):
+    """
+    Созданы ли все копии, которые нужны image.
+
+    Копии не крупнее оригинала не создаются: для маленьких фото
+    ждать их нечего.
+    """
+    names = {
+        height: get_thumbnail_name(image.name, height)
+        for height in THUMBNAIL_HEIGHTS
+    }
+    if all(image.storage.exists(name) for name in names.values()):
+        return True
+    height = get_image_height(image)
+    if height is None:
+        # Оригинал не прочитать: ошибку покажет пересжатие.
+        return False
+    return all(
+        image.storage.exists(names[size])
+        for size in get_thumbnail_heights(height)
+    )
+
+
+def find_thumbnail_name(image, height):
+    """Имя самой маленькой готовой копии не ниже height или None."""
+    for size in sorted(THUMBNAIL_HEIGHTS):
+        if size < height:
+            continue
+        name = get_thumbnail_name(image.name, size)
+        if image.storage.exists(name):
+            return name
+    return None
+
+
+def get_thumbnail_url(image, height):
+    """
+    URL самой маленькой копии не ниже height.
+
+    Пока копии не готовы (или оригинал и так меньше),
+    возвращает URL оригинала.
+
+    Найденное имя файла хранится в кеше, чтобы не проверять
+    хранилище при каждой отрисовке. Ответ «копии нет» живёт
+    недолго: копия может вот-вот появиться.
+    """
+    digest = hashlib.md5(f'{image.name}:{height}'.encode()).hexdigest()
+    key = f'birthday:thumbnail:{digest}'
+    name = cache.get(key)
+    if name is None:
+        name = find_thumbnail_name(image, height)
+        if name is not None:
+            ttl = getattr(settings, 'THUMBNAIL_URL_CACHE_TTL', 24 * 60 * 60)
+        else:
+            name = image.name
+            ttl = getattr(settings, 'THUMBNAIL_MISSING_CACHE_TTL', 30)
+        cache.set(key, name, ttl)
+    return image.storage.url(name)
@@ -1,18 +1,50 @@
+from django.conf import settings
 from django.urls import path
 
 from . import views
 
 app_name = 'birthday'
 
+# Под ASGI самые посещаемые страницы — асинхронные.
+if settings.ASYNC_VIEWS:
+    ListView = views.AsyncBirthdayListView
+    DetailView = views.AsyncBirthdayDetailView
+else:
+    ListView = views.BirthdayListView
+    DetailView = views.BirthdayDetailView
+
 urlpatterns = [
     # path('', views.birthday, name='create'),
     # path('list/', views.birthday_list, name='list'),
     # path('<int:pk>/edit/', views.birthday, name='edit'),
     # path('<int:pk>/delete/', views.delete_birthday, name='delete'),
     path('', views.BirthdayCreateView.as_view(), name='create'),
-    path('list/', views.BirthdayListView.as_view(), name='list'),
+    path('list/', ListView.as_view(), name='list'),
+    path(
+        'upcoming/',
+        views.UpcomingBirthdayListView.as_view(),
+        name='upcoming'
+    ),
+    path('calendar/', views.birthday_calendar, name='calendar'),
+    path(
+        'calendar/<int:year>/<int:month>/',
+        views.birthday_calendar,
+        name='calendar_month'
+    ),
+    path(
+        'congratulations/',
+        views.add_congratulations,
+        name='add_congratulations'
+    ),
+    path('export/', views.export_birthdays, name='export'),
+    path('tags/search/', views.tag_search, name='tag_search'),
     #path('login_only/', views.simple_view),
-    path('<int:pk>/', views.BirthdayDetailView.as_view(), name='detail'),
+    path('<int:pk>/', DetailView.as_view(), name='detail'),
+    path(
+        '<int:pk>/congratulations/',
+        views.congratulation_list,
+        name='congratulations'
+    ),
     path('<int:pk>/comment/', views.add_comment, name='add_comment'),
     path('<int:pk>/edit/', views.BirthdayUpdateView.as_view(), name='edit'),
     path('<int:pk>/delete/', views.BirthdayDeleteView.as_view(), name='delete'),
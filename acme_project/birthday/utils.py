@@ -1,4 +1,30 @@
-from datetime import date
+import re
+from datetime import date, timedelta
+
+import numpy as np
+
+# Заведомо невисокосный год: в нём 29 февраля превращается в 1 марта.
+NON_LEAP_YEAR = 2001
+# Число дней в невисокосном году.
+DAYS_IN_YEAR = 365
+# Порядковый номер 1 января 1970 года — начала отсчёта datetime64.
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# Транслитерация кириллицы для ключа имени. Звуки, которые латиницей
+# пишут по-разному, сразу приводятся к одному написанию: «я» и «ya»
+# дают «ia», поэтому одного прохода translate() достаточно.
+TRANSLIT = str.maketrans({
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'e',
+    'ж': 'zh', 'з': 'z', 'и': 'i', 'й': 'i', 'к': 'k', 'л': 'l', 'м': 'm',
+    'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
+    'ф': 'f', 'х': 'h', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'sch',
+    'ъ': '', 'ы': 'i', 'ь': '', 'э': 'e', 'ю': 'iu', 'я': 'ia',
+    # Латинские буквы, которые пишут по-разному для одних и тех же звуков.
+    'j': 'i', 'y': 'i', 'w': 'v',
+})
+# Наибольшая длина ключа имени: транслитерация удлиняет имя.
+NAME_KEY_MAX_LENGTH = 100
+
 
 def calculate_birthday_countdown(birthday):
     """
@@ -24,6 +50,38 @@ def calculate_birthday_countdown(birthday):
     birthday_countdown = (next_birthday - today).days
     return birthday_countdown
 
+
+def calculate_birthday_countdowns(birthdays, today=None):
+    """
+    Возвращает массив numpy с количеством дней до следующего дня рождения
+    для каждой даты из последовательности birthdays, в том же порядке.
+
+    Векторная версия calculate_birthday_countdown(): все даты
+    считаются за один проход по массиву datetime64.
+    """
+    if today is None:
+        today = date.today()
+    dates = to_datetime64(birthdays)
+    today = np.datetime64(today, 'D')
+    # Раскладываем даты на смещения месяца от начала года
+    # и дня от начала месяца — год дальше подставляем свой.
+    months = dates.astype('datetime64[M]')
+    month_offsets = months - dates.astype('datetime64[Y]').astype(
+        'datetime64[M]'
+    )
+    day_offsets = dates - months.astype('datetime64[D]')
+    this_year = today.astype('datetime64[Y]')
+    this_year_birthdays = get_birthdays_for_year(
+        month_offsets, day_offsets, this_year
+    )
+    next_year_birthdays = get_birthdays_for_year(
+        month_offsets, day_offsets, this_year + 1
+    )
+    next_birthdays = np.where(
+        this_year_birthdays < today, next_year_birthdays, this_year_birthdays
+    )
+    return (next_birthdays - today).astype(np.int64)
+
 def get_birthday_for_year(birthday, year):
     """
     Получает дату дня рождения для конкретного года.
@@ -40,4 +98,90 @@ def get_birthday_for_year(birthday, year):
     except ValueError:
         # В этом случае устанавливаем ДР 1 марта.
         calculated_birthday = date(year=year, month=3, day=1)
-    return calculated_birthday 
\ No newline at end of file
+    return calculated_birthday
+
+
+def to_datetime64(birthdays):
+    """
+    Преобразует последовательность дат в массив datetime64[D].
+
+    Объекты date переводятся через порядковые номера дней:
+    так в разы быстрее, чем разбор каждой даты в numpy.
+    """
+    if isinstance(birthdays, np.ndarray):
+        return birthdays.astype('datetime64[D]')
+    ordinals = np.fromiter(
+        map(date.toordinal, birthdays), dtype=np.int64, count=len(birthdays)
+    )
+    return (ordinals - EPOCH_ORDINAL).astype('datetime64[D]')
+
+
+def get_birthdays_for_year(month_offsets, day_offsets, year):
+    """
+    Векторная версия get_birthday_for_year().
+
+    Для 29 февраля в невисокосном году смещение в 28 дней
+    от 1 февраля само собой даёт 1 марта.
+    """
+    month_starts = (year.astype('datetime64[M]') + month_offsets).astype(
+        'datetime64[D]'
+    )
+    return month_starts + day_offsets
+
+
+def get_month_day(birthday):
+    """
+    Возвращает ключ «месяц-день» для даты: month * 100 + day.
+
+    По ключу записи можно сортировать и фильтровать по индексу
+    без учёта года. 29 февраля, как и в get_birthday_for_year(),
+    приравнивается к 1 марта.
+    """
+    birthday = get_birthday_for_year(birthday, NON_LEAP_YEAR)
+    return birthday.month * 100 + birthday.day
+
+
+def get_calendar_months(birthday):
+    """
+    Месяцы календаря, в которых может оказаться день рождения.
+
+    29 февраля в високосный год остаётся в феврале, а в остальные,
+    как в get_birthday_for_year(), переезжает на 1 марта.
+    """
+    if (birthday.month, birthday.day) == (2, 29):
+        return {2, 3}
+    return {birthday.month}
+
+
+def get_month_day_range(days, today=None):
+    """
+    Возвращает границы (start, end) ключей «месяц-день»
+    для дней рождения в ближайшие days дней, включая сегодняшний.
+
+    Ключи — по настоящему календарю: в високосный год 29 февраля
+    даёт 229, а не 301, как в get_month_day().
+    Если диапазон переходит через 31 декабря, то start > end.
+    Если days покрывает целый год, возвращает None.
+    """
+    if days >= DAYS_IN_YEAR - 1:
+        return None
+    if today is None:
+        today = date.today()
+    end = today + timedelta(days=days)
+    return today.month * 100 + today.day, end.month * 100 + end.day
+
+
+def make_name_key(first_name, last_name):
+    """
+    Нормализованный ключ имени для поиска похожих записей.
+
+    Регистр и пробелы не учитываются, кириллица транслитерируется,
+    повторы букв схлопываются: «Иван», «иван » и «Ivan» дают один ключ.
+    Ключ обрезается до NAME_KEY_MAX_LENGTH символов.
+    """
+    parts = []
+    for name in (first_name, last_name):
+        name = name.casefold().translate(TRANSLIT)
+        name = re.sub(r'[^a-z0-9]', '', name)
+        parts.append(re.sub(r'([a-z])\1+', r'\1', name))
+    return ' '.join(part for part in parts if part)[:NAME_KEY_MAX_LENGTH]
@@ -1,23 +1,129 @@
+import calendar
+import json
+from datetime import date
+
 from django.views.generic import (
     CreateView, DeleteView, DetailView, ListView, UpdateView
 )
+from django.conf import settings
+from django.core.paginator import InvalidPage
 from django.urls import reverse_lazy
-from django.http import HttpResponse
-from django.contrib.auth.mixins import UserPassesTestMixin
+from django.http import (
+    Http404, HttpResponse, HttpResponseBadRequest, JsonResponse,
+    StreamingHttpResponse
+)
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.decorators import login_required
-from django.shortcuts import get_object_or_404, redirect
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.shortcuts import redirect, render
+from django.template.loader import render_to_string
+from django.utils.dates import MONTHS
+from django.utils.dateparse import parse_date, parse_datetime
+from django.views.decorators.http import (
+    condition, require_POST, require_safe
+)
+from django.views.decorators.vary import vary_on_cookie
 
+from core.async_db import AsyncViewMixin
+
+from .cache import (
+    get_birthday_detail, get_calendar_month, get_calendar_version,
+    get_list_page, invalidate_birthday
+)
+from .export import EXPORT_FORMATS, get_export_queryset, iter_export
 from .forms import BirthdayForm, CongratulationForm
 from .models import Birthday, Congratulation
-from .utils import calculate_birthday_countdown
+from .paginators import (
+    CursorPaginator, WindowedPaginator, decode_cursor, encode_cursor
+)
+from .signals import bulk_created
+from .tag_index import tag_index
+from .utils import calculate_birthday_countdown, calculate_birthday_countdowns
+
+# Горизонт «ближайших» дней рождения по умолчанию и максимальный, в днях.
+UPCOMING_DAYS = 7
+UPCOMING_MAX_DAYS = 366
+# Сколько поздравлений выводить за раз.
+CONGRATULATIONS_BATCH = 20
+# Наибольшее число поздравлений в одном запросе add_congratulations.
+CONGRATULATIONS_MAX_IMPORT = 1000
+
 
+def annotate_countdowns(birthdays):
+    """Добавляет записям атрибут countdown — дни до дня рождения."""
+    # Считаем всю страницу одним вызовом, а не по записи.
+    countdowns = calculate_birthday_countdowns(
+        [birthday.birthday for birthday in birthdays]
+    )
+    for birthday, countdown in zip(birthdays, countdowns):
+        birthday.countdown = int(countdown)
+
+
+def load_congratulations(birthday_id, cursor=None):
+    """
+    Возвращает порцию поздравлений записи и курсор следующей порции.
+
+    Порции идут по индексу (birthday, created_at, id): следующая
+    выбирается условием «после последней показанной», без OFFSET.
+    Для повреждённого курсора выбрасывает InvalidPage.
+    """
+    queryset = Congratulation.objects.filter(birthday_id=birthday_id)
+    if cursor:
+        try:
+            created_at, pk = decode_cursor(cursor)['after']
+            created_at = parse_datetime(created_at)
+        except (KeyError, TypeError, ValueError):
+            raise InvalidPage('Некорректный курсор')
+        if (
+            created_at is None
+            or not isinstance(pk, int) or isinstance(pk, bool)
+        ):
+            raise InvalidPage('Некорректный курсор')
+        queryset = queryset.filter(
+            Q(created_at__gt=created_at)
+            | Q(created_at=created_at, id__gt=pk)
+        )
+    # Берём на одну запись больше, чтобы узнать, есть ли следующая порция.
+    congratulations = list(
+        queryset.select_related('author')
+        .order_by('created_at', 'id')[:CONGRATULATIONS_BATCH + 1]
+    )
+    next_cursor = None
+    if len(congratulations) > CONGRATULATIONS_BATCH:
+        congratulations = congratulations[:CONGRATULATIONS_BATCH]
+        last = congratulations[-1]
+        next_cursor = encode_cursor(
+            {'after': [last.created_at.isoformat(), last.id]}
+        )
+    return congratulations, next_cursor
+
+
+@require_safe
+def congratulation_list(request, pk):
+    # Фрагмент HTML со следующей порцией поздравлений.
+    try:
+        congratulations, next_cursor = load_congratulations(
+            pk, request.GET.get('after')
+        )
+    except InvalidPage as error:
+        return HttpResponseBadRequest(str(error))
+    return render(
+        request,
+        'birthday/includes/congratulations.html',
+        {
+            'birthday_id': pk,
+            'congratulations': congratulations,
+            'next_cursor': next_cursor,
+        },
+    )
 
 
 @login_required
 def add_comment(request, pk):
-    # Получаем объект дня рождения или выбрасываем 404 ошибку.
-    birthday = get_object_or_404(Birthday, pk=pk)
+    # Проверяем, что запись существует, не загружая её целиком.
+    if not Birthday.objects.filter(pk=pk).exists():
+        raise Http404('Запись не найдена')
     # Функция должна обрабатывать только POST-запросы.
     form = CongratulationForm(request.POST)
     if form.is_valid():
@@ -25,36 +131,333 @@ def add_comment(request, pk):
         congratulation = form.save(commit=False)
         # В поле author передаём объект автора поздравления.
         congratulation.author = request.user
-        # В поле birthday передаём объект дня рождения.
-        congratulation.birthday = birthday
+        # В поле birthday передаём id дня рождения.
+        congratulation.birthday_id = pk
         # Сохраняем объект в БД.
         congratulation.save()
     # Перенаправляем пользователя назад, на страницу дня рождения.
     return redirect('birthday:detail', pk=pk)
 
 
-class OnlyAuthorMixin(UserPassesTestMixin):
+@login_required
+@require_POST
+def add_congratulations(request):
+    """
+    Принимает пачку поздравлений в JSON:
+    {"congratulations": [{"birthday": id, "text": "..."}, ...]}.
+
+    Отвечает списками принятых и отклонённых элементов по их индексам.
+
+    Обработчик для скриптов самого сайта, а не внешний API: нужны
+    сессия и CSRF-токен в заголовке X-CSRFToken, как у обычных форм.
+    """
+    try:
+        items = json.loads(request.body)['congratulations']
+    except (ValueError, KeyError, TypeError):
+        return HttpResponseBadRequest('Ожидается JSON с ключом congratulations')
+    if not isinstance(items, list):
+        return HttpResponseBadRequest('congratulations должен быть списком')
+    if len(items) > CONGRATULATIONS_MAX_IMPORT:
+        return HttpResponseBadRequest(
+            f'Не больше {CONGRATULATIONS_MAX_IMPORT} поздравлений за запрос'
+        )
+
+    rejected = []
+    valid = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            rejected.append(
+                {'index': index, 'errors': {'__all__': ['Ожидается объект']}}
+            )
+            continue
+        # Текст проверяем той же формой, что и у одиночного поздравления.
+        form = CongratulationForm({'text': item.get('text')})
+        errors = {
+            field: list(messages) for field, messages in form.errors.items()
+        }
+        birthday_id = item.get('birthday')
+        if type(birthday_id) is not int:
+            errors['birthday'] = ['Укажите id записи']
+        if errors:
+            rejected.append({'index': index, 'errors': errors})
+            continue
+        congratulation = form.save(commit=False)
+        congratulation.author = request.user
+        congratulation.birthday_id = birthday_id
+        valid.append((index, congratulation))
+
+    # Существование всех записей проверяем одним запросом.
+    existing = set(
+        Birthday.objects.filter(
+            pk__in={congratulation.birthday_id for _, congratulation in valid}
+        ).values_list('pk', flat=True)
+    )
+    accepted = []
+    for index, congratulation in valid:
+        if congratulation.birthday_id in existing:
+            accepted.append((index, congratulation))
+        else:
+            rejected.append({
+                'index': index,
+                'errors': {'birthday': ['Запись не найдена']},
+            })
+
+    try:
+        with transaction.atomic():
+            created = Congratulation.objects.bulk_create(
+                [congratulation for _, congratulation in accepted]
+            )
+            # bulk_create() не отправляет post_save: сообщаем о вставке
+            # сами, кеш записей сбрасываем ниже.
+            bulk_created.send(sender=Congratulation, objects=created)
+    except IntegrityError:
+        # Запись удалили между проверкой и вставкой: пачка не сохранена.
+        return JsonResponse(
+            {'error': 'Записи изменились, повторите запрос'}, status=409
+        )
+    for birthday_id in {item.birthday_id for item in created}:
+        invalidate_birthday(birthday_id)
+    return JsonResponse({
+        'accepted': [
+            {'index': index, 'id': congratulation.pk}
+            for index, congratulation in accepted
+        ],
+        'rejected': sorted(rejected, key=lambda item: item['index']),
+    })
+
+
+@login_required
+@require_safe
+def export_birthdays(request):
+    # Формат и фильтры передаются GET-параметрами.
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return HttpResponseBadRequest('Неизвестный формат выгрузки')
+    dates = {}
+    for name in ('date_from', 'date_to'):
+        value = request.GET.get(name)
+        if not value:
+            continue
+        try:
+            dates[name] = parse_date(value)
+        except ValueError:
+            dates[name] = None
+        if dates[name] is None:
+            return HttpResponseBadRequest(f'Некорректная дата в {name}')
+    # Пользователь выгружает только свои записи: всю базу выгружает
+    # команда export_birthdays.
+    queryset = get_export_queryset(**dates).filter(author=request.user)
+    # Строки отдаются по мере чтения из БД: память не растёт с объёмом.
+    response = StreamingHttpResponse(
+        iter_export(queryset, export_format),
+        content_type=(
+            'text/csv; charset=utf-8' if export_format == 'csv'
+            else 'application/x-ndjson; charset=utf-8'
+        ),
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="birthdays.{export_format}"'
+    )
+    return response
+
+
+@login_required
+@require_safe
+def tag_search(request):
+    # Поиск по префиксу идёт по индексу тегов в памяти, без запроса к БД.
+    results = [
+        {'id': pk, 'text': name}
+        for pk, name in tag_index.search(request.GET.get('q', ''))
+    ]
+    return JsonResponse({'results': results})
+
+
+def get_calendar_month_or_404(year, month):
+    """Год и месяц календаря; без них — текущий месяц."""
+    if year is None:
+        today = date.today()
+        return today.year, today.month
+    if not (1 <= month <= 12 and 1 <= year <= 9999):
+        raise Http404('Нет такого месяца')
+    return year, month
+
+
+def get_calendar_etag(request, year=None, month=None):
+    year, month = get_calendar_month_or_404(year, month)
+    # Страница меняется с версией месяца, с датой (отметка «сегодня»)
+    # и с пользователем (шапка сайта).
+    return (
+        f'{year}-{month}-{get_calendar_version(month)}-'
+        f'{date.today().isoformat()}-{request.user.pk}'
+    )
+
 
-    def test_func(self):
-        object = self.get_object()
-        return object.author == self.request.user 
+def render_calendar_month(year, month, today):
+    counts = Birthday.objects.count_by_day(year, month)
+    weeks = [
+        [
+            {
+                'day': day,
+                'count': counts.get(day, 0),
+                'today': date(year, month, day) == today,
+            } if day else None
+            for day in week
+        ]
+        for week in calendar.Calendar().monthdayscalendar(year, month)
+    ]
+    return render_to_string(
+        'birthday/includes/calendar_month.html',
+        {'weeks': weeks, 'total': sum(counts.values())},
+    )
+
+
+@vary_on_cookie
+@require_safe
+@condition(etag_func=get_calendar_etag)
+def birthday_calendar(request, year=None, month=None):
+    year, month = get_calendar_month_or_404(year, month)
+    today = date.today()
+    # Отметка сегодняшнего дня есть только в текущем месяце.
+    today_key = today.isoformat() if (year, month) == (
+        today.year, today.month
+    ) else ''
+    # Сетка месяца кешируется до записи, затрагивающей этот месяц.
+    month_html = get_calendar_month(
+        year, month, today_key,
+        lambda: render_calendar_month(year, month, today),
+    )
+    previous = (year - 1, 12) if month == 1 else (year, month - 1)
+    following = (year + 1, 1) if month == 12 else (year, month + 1)
+    return render(request, 'birthday/birthday_calendar.html', {
+        'year': year,
+        'month_name': MONTHS[month],
+        'month_html': month_html,
+        'previous': previous if previous[0] >= 1 else None,
+        'next': following if following[0] <= 9999 else None,
+    })
+
+
+class OnlyAuthorMixin:
+    """
+    Доступ только для автора записи.
+
+    Проверка авторства — условие в запросе: чужая запись просто
+    не находится (404), и объект загружается один раз за запрос.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(author=self.request.user)
+
+    def get_object(self, queryset=None):
+        if queryset is not None:
+            return super().get_object(queryset)
+        if not hasattr(self, '_author_object'):
+            self._author_object = super().get_object()
+        return self._author_object
+
+
+class WindowedPaginationMixin:
+    """
+    Пагинация по номерам страниц без COUNT(*) по всей таблице:
+    в шаблоне выводится только окно из соседних страниц.
+    """
+    page_window = 2
+
+    def get_page(self, queryset, page_size):
+        paginator = WindowedPaginator(queryset, page_size, self.page_window)
+        try:
+            return paginator.page(self.request.GET.get(self.page_kwarg, 1))
+        except InvalidPage as error:
+            raise Http404(str(error))
+
+    def paginate_queryset(self, queryset, page_size):
+        page = self.get_page(queryset, page_size)
+        return None, page, page.object_list, page.has_other_pages()
 
 
 # Наследуем класс от встроенного ListView:
-class BirthdayListView(ListView):
+class BirthdayListView(WindowedPaginationMixin, ListView):
     # Указываем модель, с которой работает CBV...
     model = Birthday
     # По умолчанию этот класс
     # выполняет запрос queryset = Birthday.objects.all(),
     # но мы его переопределим:
-    queryset = Birthday.objects.prefetch_related(
-        'tags'
-    ).select_related('author')
+    # Теги берём из поля tag_labels, поэтому prefetch_related('tags')
+    # и второй запрос на страницу не нужны.
+    queryset = Birthday.objects.select_related('author')
     # ...сортировку, которая будет применена при выводе списка объектов:
     ordering = 'id'
     # ...и даже настройки пагинации:
     paginate_by = 10
 
+    def get_pagination_mode(self):
+        # 'cursor' — курсор по id, 'page' — номера страниц.
+        return getattr(settings, 'BIRTHDAY_LIST_PAGINATION', 'cursor')
+
+    def get_page(self, queryset, page_size):
+        if self.get_pagination_mode() != 'cursor':
+            return super().get_page(queryset, page_size)
+        paginator = CursorPaginator(queryset, page_size, key='id')
+        try:
+            return paginator.page(self.request.GET.get('cursor'))
+        except InvalidPage as error:
+            raise Http404(str(error))
+
+    def paginate_queryset(self, queryset, page_size):
+        # Страница читается через кеш: его сбрасывает любая запись
+        # в Birthday, теги или связи с тегами.
+        position = (
+            self.request.GET.get('cursor')
+            or self.request.GET.get(self.page_kwarg, '')
+        )
+        page = get_list_page(
+            f'{self.get_pagination_mode()}:{page_size}:{position}',
+            lambda: self.get_page(queryset, page_size),
+        )
+        return None, page, page.object_list, page.has_other_pages()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['pagination_mode'] = self.get_pagination_mode()
+        annotate_countdowns(context['page_obj'])
+        # Для ключей кеша строк списка.
+        context['today'] = date.today().isoformat()
+        context['row_cache_ttl'] = getattr(
+            settings, 'BIRTHDAY_ROW_CACHE_TTL', 3600
+        )
+        return context
+
+
+class AsyncBirthdayListView(AsyncViewMixin, BirthdayListView):
+    # Для ASGI: выборка и шаблон — в пуле потоков БД.
+    pass
+
+
+class UpcomingBirthdayListView(WindowedPaginationMixin, ListView):
+    model = Birthday
+    template_name = 'birthday/birthday_upcoming.html'
+    paginate_by = 10
+
+    def get_days(self):
+        try:
+            days = int(self.request.GET.get('days', UPCOMING_DAYS))
+        except ValueError:
+            days = UPCOMING_DAYS
+        return min(max(days, 0), UPCOMING_MAX_DAYS)
+
+    def get_queryset(self):
+        self.days = self.get_days()
+        # Выборка идёт по индексу month_day, а не перебором всех записей.
+        return Birthday.objects.upcoming(self.days).select_related('author')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['days'] = self.days
+        # Сохраняем горизонт в ссылках пагинатора.
+        context['page_query'] = f'days={self.days}&'
+        annotate_countdowns(context['page_obj'])
+        return context
+
 
 class BirthdayCreateView(LoginRequiredMixin, CreateView):
     model = Birthday
@@ -86,6 +489,20 @@ class BirthdayDeleteView(LoginRequiredMixin, OnlyAuthorMixin, DeleteView):
 class BirthdayDetailView(DetailView):
     model = Birthday
 
+    def get_object(self, queryset=None):
+        # Запись и её поздравления читаются через кеш с версией записи.
+        birthday, self.congratulations, self.next_cursor = get_birthday_detail(
+            self.kwargs[self.pk_url_kwarg],
+            lambda: self.load_detail(queryset),
+        )
+        return birthday
+
+    def load_detail(self, queryset=None):
+        birthday = super().get_object(queryset)
+        # Только первую порцию поздравлений, вместе с их авторами;
+        # остальные страница подгружает по кнопке.
+        return (birthday, *load_congratulations(birthday.pk))
+
     def get_context_data(self, **kwargs):
         # Получаем словарь контекста:
         context = super().get_context_data(**kwargs)
@@ -96,13 +513,13 @@ class BirthdayDetailView(DetailView):
         )
         # Записываем в переменную form пустой объект формы.
         context['form'] = CongratulationForm()
-        # Запрашиваем все поздравления для выбранного дня рождения.
-        context['congratulations'] = (
-            # Дополнительно подгружаем авторов комментариев,
-            # чтобы избежать множества запросов к БД.
-            self.object.congratulations.select_related('author')
-        )
+        # Первая порция поздравлений уже загружена вместе с записью.
+        context['congratulations'] = self.congratulations
+        context['next_cursor'] = self.next_cursor
         # Возвращаем словарь контекста.
         return context
 
 
+class AsyncBirthdayDetailView(AsyncViewMixin, BirthdayDetailView):
+    # Для ASGI: запись, поздравления и шаблон — в пуле потоков БД.
+    pass
@@ -0,0 +1,44 @@
+from django import forms
+from django.forms.renderers import TemplatesSetting
+from django.urls import reverse_lazy
+
+
+class TagSearchWidget(forms.SelectMultiple):
+    """
+    Выбор тегов с поиском на сервере.
+
+    В <select> выводятся только уже выбранные теги, остальные
+    подгружаются поиском по префиксу, поэтому размер страницы
+    не зависит от числа тегов в базе.
+    """
+    template_name = 'birthday/widgets/tag_search.html'
+    search_url = reverse_lazy('birthday:tag_search')
+    # Шаблон лежит в каталоге шаблонов проекта: его видит только
+    # TemplatesSetting, остальные виджеты рендерятся как обычно.
+    renderer = TemplatesSetting()
+
+    def render(self, name, value, attrs=None, renderer=None):
+        return super().render(name, value, attrs, renderer=self.renderer)
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['search_url'] = self.search_url
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        field = self.choices.field
+        selected = [pk for pk in value if str(pk).isdigit()]
+        if not selected:
+            return []
+        tags = field.queryset.filter(pk__in=selected)
+        return [
+            (
+                None,
+                [self.create_option(
+                    name, tag.pk, field.label_from_instance(tag), True,
+                    index, attrs=attrs,
+                )],
+                index,
+            )
+            for index, tag in enumerate(tags)
+        ]
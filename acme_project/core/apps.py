@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from .db import set_sqlite_pragmas
+
+        # Прагмы SQLite выставляются каждому новому соединению.
+        connection_created.connect(set_sqlite_pragmas)
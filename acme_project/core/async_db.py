@@ -0,0 +1,59 @@
+"""
+Отдельный пул потоков для работы с БД из асинхронных представлений.
+
+Соединения Django привязаны к потоку: у каждого потока пула своё
+соединение, которое живёт CONN_MAX_AGE секунд, как и в WSGI-воркере.
+Размер пула — ASYNC_DB_THREADS.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+_executor = None
+_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'ASYNC_DB_THREADS', 8),
+                thread_name_prefix='acme-db',
+            )
+    return _executor
+
+
+def _call(func, *args, **kwargs):
+    # Как между запросами в WSGI: закрываем устаревшие
+    # и сломанные соединения этого потока.
+    close_old_connections()
+    return func(*args, **kwargs)
+
+
+async def run_in_db_pool(func, *args, **kwargs):
+    """Выполняет синхронную func в пуле БД и возвращает её результат."""
+    return await sync_to_async(
+        _call, thread_sensitive=False, executor=get_executor()
+    )(func, *args, **kwargs)
+
+
+class AsyncViewMixin:
+    """
+    Асинхронная версия представления для ASGI.
+
+    Запросы к БД и отрисовка шаблона (она тоже обращается к БД,
+    например за request.user) выполняются в пуле БД, а не в общем
+    пуле синхронного адаптера ASGI.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        def get_response():
+            response = super(AsyncViewMixin, self).get(
+                request, *args, **kwargs
+            )
+            return response.render()
+        return await run_in_db_pool(get_response)
@@ -0,0 +1,104 @@
+"""
+Общие части бенчмарков: замеры, перцентили, сравнение с эталоном.
+
+Результаты хранятся в JSON вида
+{"meta": {...}, "results": {"<набор>": {"<сценарий>": {...}}}}.
+"""
+import json
+import platform
+import statistics
+from contextlib import ExitStack
+from datetime import datetime, timezone
+from time import perf_counter
+
+import django
+from django.db import connections
+
+from .middleware import QueryRecorder
+
+PERCENTILES = (50, 90, 99)
+
+
+def get_percentiles(samples):
+    """Перцентили PERCENTILES выборки в миллисекундах."""
+    if len(samples) == 1:
+        return {f'p{p}_ms': samples[0] * 1000 for p in PERCENTILES}
+    cuts = statistics.quantiles(samples, n=100, method='inclusive')
+    return {f'p{p}_ms': cuts[p - 1] * 1000 for p in PERCENTILES}
+
+
+def measure(func, repeat, setup=None):
+    """
+    Вызывает func(state) repeat раз и возвращает перцентили времени
+    и наибольшее число SQL-запросов за вызов по всем соединениям.
+
+    state — результат setup(), который выполняется перед каждым
+    вызовом и в замер не входит; без setup state равно None.
+    """
+    samples = []
+    max_queries = 0
+    for _ in range(repeat):
+        state = setup() if setup is not None else None
+        recorder = QueryRecorder()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            started = perf_counter()
+            func(state)
+            samples.append(perf_counter() - started)
+        max_queries = max(max_queries, len(recorder.shapes))
+    return {**get_percentiles(samples), 'queries': max_queries}
+
+
+def make_report(results, **meta):
+    return {
+        'meta': {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            **meta,
+        },
+        'results': results,
+    }
+
+
+def load_report(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def save_report(report, path):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+        file.write('\n')
+
+
+def find_regressions(results, baseline, threshold, min_delta_ms=1.0):
+    """
+    Сравнивает результаты с эталоном.
+
+    Регрессия — рост p50 больше чем на долю threshold (и не меньше
+    min_delta_ms, чтобы не ловить шум) или любой рост числа запросов.
+    Сравниваются только сценарии, которые есть в обоих отчётах.
+    """
+    regressions = []
+    for dataset, scenarios in results.items():
+        for name, result in scenarios.items():
+            base = baseline.get(dataset, {}).get(name)
+            if base is None:
+                continue
+            if result['queries'] > base['queries']:
+                regressions.append(
+                    f'{dataset}/{name}: запросов {base["queries"]} '
+                    f'→ {result["queries"]}'
+                )
+            delta = result['p50_ms'] - base['p50_ms']
+            if (
+                delta > base['p50_ms'] * threshold
+                and delta >= min_delta_ms
+            ):
+                regressions.append(
+                    f'{dataset}/{name}: p50 {base["p50_ms"]:.2f} '
+                    f'→ {result["p50_ms"]:.2f} мс'
+                )
+    return regressions
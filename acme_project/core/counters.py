@@ -0,0 +1,74 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import Counter
+
+# Кеш значений в памяти процесса: name -> (value, expires_at).
+_cache = {}
+_lock = threading.Lock()
+
+
+def get_counter(name, default=None):
+    """
+    Возвращает значение счётчика name.
+
+    Значение кешируется в процессе на COUNTER_CACHE_TTL секунд.
+    Если счётчика ещё нет, он создаётся со значением default().
+
+    Строка счётчика создаётся до вызова default() и в той же
+    транзакции: add_to_counter из других процессов ждёт её коммита
+    и прибавляет к уже посчитанному значению, а не теряется.
+    """
+    now = time.monotonic()
+    with _lock:
+        cached = _cache.get(name)
+    if cached is not None and cached[1] > now:
+        return cached[0]
+    value = Counter.objects.filter(name=name).values_list(
+        'value', flat=True
+    ).first()
+    if value is None:
+        try:
+            with transaction.atomic():
+                counter = Counter.objects.create(name=name, value=0)
+                if default is not None:
+                    counter.value = default()
+                    counter.save(update_fields=('value',))
+            value = counter.value
+        except IntegrityError:
+            # Счётчик успел создать другой процесс.
+            value = Counter.objects.values_list('value', flat=True).get(
+                name=name
+            )
+    ttl = getattr(settings, 'COUNTER_CACHE_TTL', 5)
+    with _lock:
+        _cache[name] = (value, now + ttl)
+    return value
+
+
+def add_to_counter(name, delta):
+    """Атомарно прибавляет delta к счётчику, если он уже создан."""
+    Counter.objects.filter(name=name).update(value=F('value') + delta)
+    forget_counter(name)
+
+
+def set_counter(name, value):
+    """Записывает точное значение счётчика и возвращает прежнее."""
+    counter, created = Counter.objects.get_or_create(
+        name=name, defaults={'value': value}
+    )
+    previous = None if created else counter.value
+    if not created and counter.value != value:
+        Counter.objects.filter(name=name).update(value=value)
+    forget_counter(name)
+    return previous
+
+
+def forget_counter(name):
+    """Сбрасывает значение счётчика name из кеша процесса."""
+    with _lock:
+        _cache.pop(name, None)
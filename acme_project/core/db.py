@@ -0,0 +1,21 @@
+from django.conf import settings
+
+# Эти прагмы меняют файл базы: соединению только для чтения они недоступны.
+WRITE_PRAGMAS = {'journal_mode'}
+
+
+def is_read_only(connection):
+    return 'mode=ro' in str(connection.settings_dict['NAME'])
+
+
+def set_sqlite_pragmas(sender, connection, **kwargs):
+    """Выставляет SQLITE_PRAGMAS новому соединению с SQLite."""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    read_only = is_read_only(connection)
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            if read_only and name in WRITE_PRAGMAS:
+                continue
+            cursor.execute(f'PRAGMA {name} = {value}')
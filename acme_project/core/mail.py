@@ -0,0 +1,90 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+
+def queue_mail(subject, message, from_email, recipient_list):
+    """
+    Ставит письмо в очередь вместо отправки.
+
+    Это одна вставка в таблицу в текущей транзакции;
+    отправляет письма команда send_queued_mail.
+    """
+    return OutgoingEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email,
+        recipients=list(recipient_list),
+    )
+
+
+def get_retry_delay(attempts):
+    """Экспоненциальная задержка перед следующей попыткой."""
+    base = getattr(settings, 'OUTBOX_RETRY_DELAY', 60)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), 24 * 60 * 60))
+
+
+def claim_email(email, now):
+    """
+    Забирает письмо себе условным UPDATE: срок попытки сдвигается
+    на OUTBOX_CLAIM_TIMEOUT секунд вперёд, только если его ещё
+    не сдвинул другой обработчик. Возвращает True, если письмо наше.
+
+    Если обработчик упадёт, не дойдя до отправки, письмо снова
+    станет доступным по истечении этого срока.
+    """
+    timeout = getattr(settings, 'OUTBOX_CLAIM_TIMEOUT', 600)
+    claimed = OutgoingEmail.objects.filter(
+        pk=email.pk,
+        status=OutgoingEmail.PENDING,
+        next_attempt_at=email.next_attempt_at,
+    ).update(next_attempt_at=now + timedelta(seconds=timeout))
+    return claimed == 1
+
+
+def send_queued_batch(connection, batch_size=100):
+    """
+    Отправляет через открытое соединение connection
+    до batch_size писем, время попытки которых наступило.
+    Письма, которые уже забрал другой обработчик, пропускаются.
+
+    Возвращает пару (отправлено, ошибок).
+    """
+    now = timezone.now()
+    candidates = OutgoingEmail.objects.filter(
+        status=OutgoingEmail.PENDING, next_attempt_at__lte=now
+    ).order_by('next_attempt_at')[:batch_size]
+    emails = [email for email in candidates if claim_email(email, now)]
+    max_attempts = getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 5)
+    sent = failed = 0
+    for email in emails:
+        message = EmailMessage(
+            subject=email.subject,
+            body=email.body,
+            from_email=email.from_email,
+            to=email.recipients,
+            connection=connection,
+        )
+        email.attempts += 1
+        try:
+            connection.send_messages([message])
+        except Exception as error:
+            failed += 1
+            email.last_error = repr(error)
+            if email.attempts >= max_attempts:
+                email.status = OutgoingEmail.FAILED
+            else:
+                email.next_attempt_at = now + get_retry_delay(email.attempts)
+        else:
+            sent += 1
+            email.status = OutgoingEmail.SENT
+            email.sent_at = timezone.now()
+    OutgoingEmail.objects.bulk_update(
+        emails,
+        ('status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at'),
+    )
+    return sent, failed
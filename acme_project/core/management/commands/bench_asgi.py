@@ -0,0 +1,253 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from time import perf_counter, sleep
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmarks import get_percentiles, make_report, save_report
+
+MODES = ('wsgi', 'asgi')
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает ASGI (асинхронные представления) и WSGI (пул воркеров) '
+        'под нагрузкой от множества медленных клиентов: главная, список '
+        'и страницы записей из текущей базы. Запросы только на чтение; '
+        'базу сначала заполните командой generate_birthdays.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--clients', type=int, default=100,
+            help='Сколько клиентов одновременно ждут ответа.',
+        )
+        parser.add_argument(
+            '--requests', type=int, default=1000,
+            help='Сколько запросов выполнить в каждом режиме.',
+        )
+        parser.add_argument(
+            '--slow-send', type=float, default=0.05,
+            help='Сколько секунд клиент передаёт запрос.',
+        )
+        parser.add_argument(
+            '--slow-read', type=float, default=0.05,
+            help='Сколько секунд клиент читает ответ.',
+        )
+        parser.add_argument(
+            '--wsgi-workers', type=int, default=8,
+            help='Число потоков WSGI-сервера (как у gunicorn --threads).',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Куда записать результаты.')
+        # Служебный параметр: замер одного режима в дочернем процессе.
+        parser.add_argument('--mode', choices=MODES, help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options['mode']:
+            result = self.run_mode(options['mode'], options)
+            self.stdout.write(json.dumps(result))
+            return
+
+        # Каждый режим — в своём процессе: под ASGI включены
+        # асинхронные представления, и URLconf у режимов разный.
+        results = {}
+        self.stdout.write(
+            f'{"режим":<6} {"запр./с":>9} {"p50, мс":>9} '
+            f'{"p90, мс":>9} {"p99, мс":>9}'
+        )
+        for mode in MODES:
+            results[mode] = self.run_child(mode, options)
+            result = results[mode]
+            self.stdout.write(
+                f'{mode:<6} {result["rps"]:>9.1f} {result["p50_ms"]:>9.1f} '
+                f'{result["p90_ms"]:>9.1f} {result["p99_ms"]:>9.1f}'
+            )
+        if options['output']:
+            save_report(
+                make_report(
+                    results,
+                    **{
+                        name: options[name] for name in (
+                            'clients', 'requests', 'slow_send', 'slow_read',
+                            'wsgi_workers',
+                        )
+                    },
+                    async_db_threads=settings.ASYNC_DB_THREADS,
+                ),
+                options['output'],
+            )
+
+    def run_child(self, mode, options):
+        command = [
+            sys.executable, '-m', 'django', 'bench_asgi', '--mode', mode,
+            '--clients', str(options['clients']),
+            '--requests', str(options['requests']),
+            '--slow-send', str(options['slow_send']),
+            '--slow-read', str(options['slow_read']),
+            '--wsgi-workers', str(options['wsgi_workers']),
+            '--seed', str(options['seed']),
+        ]
+        env = {
+            **os.environ,
+            'ACME_ASYNC_VIEWS': '1' if mode == 'asgi' else '0',
+        }
+        process = subprocess.run(
+            command, cwd=settings.BASE_DIR, env=env,
+            capture_output=True, text=True,
+        )
+        if process.returncode:
+            raise CommandError(f'Замер {mode} не удался:\n{process.stderr}')
+        return json.loads(process.stdout.strip().splitlines()[-1])
+
+    def get_paths(self, count, seed):
+        from birthday.models import Birthday
+
+        rng = random.Random(seed)
+        ids = list(Birthday.objects.values_list('id', flat=True)[:10_000])
+        if not ids:
+            raise CommandError(
+                'В базе нет записей: запустите generate_birthdays'
+            )
+        paths = []
+        for _ in range(count):
+            kind = rng.random()
+            if kind < 0.2:
+                paths.append('/')
+            elif kind < 0.5:
+                paths.append('/birthday/list/')
+            else:
+                paths.append(f'/birthday/{rng.choice(ids)}/')
+        return paths
+
+    def run_mode(self, mode, options):
+        paths = self.get_paths(options['requests'], options['seed'])
+        started = perf_counter()
+        if mode == 'asgi':
+            latencies = asyncio.run(self.run_asgi(paths, options))
+        else:
+            latencies = self.run_wsgi(paths, options)
+        elapsed = perf_counter() - started
+        return {
+            'rps': len(latencies) / elapsed,
+            **get_percentiles(latencies),
+        }
+
+    async def run_asgi(self, paths, options):
+        from acme_project.asgi import application
+
+        queue = list(reversed(paths))
+        latencies = []
+
+        async def client():
+            while queue:
+                path = queue.pop()
+                started = perf_counter()
+
+                async def receive():
+                    # Медленный клиент долго передаёт запрос.
+                    await asyncio.sleep(options['slow_send'])
+                    return {'type': 'http.request', 'body': b''}
+
+                async def send(message):
+                    if message['type'] == 'http.response.start':
+                        if message['status'] != 200:
+                            raise CommandError(
+                                f'{path}: ответ {message["status"]}'
+                            )
+                    elif not message.get('more_body'):
+                        # ...и долго читает ответ.
+                        await asyncio.sleep(options['slow_read'])
+
+                await application(
+                    self.make_scope(path), receive, send
+                )
+                latencies.append(perf_counter() - started)
+
+        await asyncio.gather(*(client() for _ in range(options['clients'])))
+        return latencies
+
+    def run_wsgi(self, paths, options):
+        from acme_project.wsgi import application
+
+        latencies = []
+        lock = threading.Lock()
+
+        def handle(path, queued_at):
+            # Воркер занят, пока клиент передаёт запрос и читает ответ.
+            sleep(options['slow_send'])
+            status = []
+            body = application(
+                self.make_environ(path),
+                lambda value, headers, exc_info=None: status.append(value),
+            )
+            try:
+                for _ in body:
+                    pass
+            finally:
+                body.close()
+            if not status[0].startswith('200'):
+                raise CommandError(f'{path}: ответ {status[0]}')
+            sleep(options['slow_read'])
+            with lock:
+                latencies.append(perf_counter() - queued_at)
+
+        # Клиенты приходят так же, как в ASGI: не больше clients сразу.
+        slots = threading.Semaphore(options['clients'])
+        with ThreadPoolExecutor(options['wsgi_workers']) as executor:
+            futures = []
+            for path in paths:
+                slots.acquire()
+                future = executor.submit(handle, path, perf_counter())
+                future.add_done_callback(lambda _: slots.release())
+                futures.append(future)
+            for future in futures:
+                future.result()
+        return latencies
+
+    @staticmethod
+    def make_scope(path):
+        return {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [(b'host', b'localhost')],
+            'client': ('127.0.0.1', 50000),
+            'server': ('localhost', 80),
+        }
+
+    @staticmethod
+    def make_environ(path):
+        return {
+            'REQUEST_METHOD': 'GET',
+            'SCRIPT_NAME': '',
+            'PATH_INFO': path,
+            'QUERY_STRING': '',
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': 'localhost',
+            'REMOTE_ADDR': '127.0.0.1',
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': BytesIO(),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
@@ -0,0 +1,97 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import (
+    override_settings, setup_databases, setup_test_environment,
+    teardown_databases, teardown_test_environment
+)
+from django.urls import reverse
+
+from core.benchmarks import make_report, measure, save_report
+
+User = get_user_model()
+
+CACHED_AUTH_MIDDLEWARE = 'users.middleware.CachedAuthenticationMiddleware'
+AUTH_MIDDLEWARE = 'django.contrib.auth.middleware.AuthenticationMiddleware'
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет накладные расходы на сессию и пользователя в запросе '
+        'авторизованного пользователя: сессии в БД и AuthenticationMiddleware '
+        'против cached_db и CachedAuthenticationMiddleware.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=500)
+        parser.add_argument('--output', help='Куда записать результаты.')
+
+    def handle(self, *args, **options):
+        # Режимы сравниваются независимо от того, какой включён
+        # в настройках: кеш в замере один на процесс.
+        modes = {
+            'db': {
+                'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+                'MIDDLEWARE': self.replace_middleware(
+                    CACHED_AUTH_MIDDLEWARE, AUTH_MIDDLEWARE
+                ),
+            },
+            'cached': {
+                'SESSION_ENGINE':
+                    'django.contrib.sessions.backends.cached_db',
+                'MIDDLEWARE': self.replace_middleware(
+                    AUTH_MIDDLEWARE, CACHED_AUTH_MIDDLEWARE
+                ),
+            },
+        }
+        setup_test_environment(debug=False)
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            user = User.objects.create_user('bench')
+            results = {}
+            for mode, overrides in modes.items():
+                with override_settings(**overrides):
+                    results[mode] = self.run_mode(user, options['repeat'])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(
+            f'{"режим":<8} {"p50, мс":>9} {"p90, мс":>9} '
+            f'{"p99, мс":>9} {"SQL":>5}'
+        )
+        for mode, result in results.items():
+            self.stdout.write(
+                f'{mode:<8} {result["p50_ms"]:>9.3f} {result["p90_ms"]:>9.3f} '
+                f'{result["p99_ms"]:>9.3f} {result["queries"]:>5}'
+            )
+        if options['output']:
+            save_report(
+                make_report(results, repeat=options['repeat']),
+                options['output'],
+            )
+
+    @staticmethod
+    def replace_middleware(old, new):
+        return [
+            new if name == old else name for name in settings.MIDDLEWARE
+        ]
+
+    @staticmethod
+    def run_mode(user, repeat):
+        cache.clear()
+        client = Client()
+        client.force_login(user)
+        # Пустой поиск тегов не обращается к БД: остаются только
+        # сессия и пользователь. Первый запрос прогревает кеши.
+        url = reverse('birthday:tag_search')
+
+        def request(_):
+            response = client.get(url)
+            if response.status_code != 200:
+                raise CommandError(f'{url}: ответ {response.status_code}')
+
+        request(None)
+        return measure(request, repeat)
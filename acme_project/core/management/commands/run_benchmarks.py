@@ -0,0 +1,220 @@
+from datetime import date
+from itertools import count
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import (
+    setup_databases, setup_test_environment, teardown_databases,
+    teardown_test_environment
+)
+from django.urls import reverse
+
+from birthday.datasets import generate_dataset
+from birthday.models import Birthday, Congratulation
+from birthday.paginators import encode_cursor
+from core.benchmarks import (
+    find_regressions, load_report, make_report, measure, save_report
+)
+
+User = get_user_model()
+
+DEFAULT_SIZES = (1000, 10_000)
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет время ответа (p50/p90/p99) и число SQL-запросов страниц '
+        'тестовым клиентом на синтетических данных разного объёма '
+        'во временной тестовой базе. Сравнивает результат с эталоном.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', nargs='+', type=int, default=DEFAULT_SIZES,
+            help='Число записей о днях рождения в каждом наборе данных.',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=30,
+            help='Сколько раз выполнить каждый сценарий.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--warm', action='store_true',
+            help='Не очищать кеш перед каждым запросом.',
+        )
+        parser.add_argument(
+            '--output', default='benchmarks.json',
+            help='Куда записать результаты.',
+        )
+        parser.add_argument(
+            '--baseline',
+            help='Эталонный отчёт для сравнения.',
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=0.25,
+            help='Допустимый рост p50 относительно эталона, доля.',
+        )
+        parser.add_argument(
+            '--min-delta-ms', type=float, default=1.0,
+            help='Меньший рост p50 не считается регрессией.',
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            try:
+                baseline = load_report(options['baseline'])['results']
+            except (OSError, ValueError, KeyError) as error:
+                raise CommandError(f'Не удалось прочитать эталон: {error}')
+        self.repeat = options['repeat']
+        self.warm = options['warm']
+
+        # DEBUG выключен, как в продакшене и в тестах.
+        setup_test_environment(debug=False)
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            results = {}
+            for size in sorted(options['sizes']):
+                results[str(size)] = self.run_dataset(size, options['seed'])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        save_report(
+            make_report(
+                results,
+                sizes=options['sizes'],
+                repeat=self.repeat,
+                warm=self.warm,
+                pagination=getattr(
+                    settings, 'BIRTHDAY_LIST_PAGINATION', 'cursor'
+                ),
+            ),
+            options['output'],
+        )
+        self.stdout.write(f'Результаты записаны в {options["output"]}')
+        if baseline is None:
+            return
+        regressions = find_regressions(
+            results, baseline, options['threshold'], options['min_delta_ms']
+        )
+        if regressions:
+            raise CommandError(
+                'Регрессии относительно эталона:\n' + '\n'.join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS('Регрессий нет'))
+
+    def run_dataset(self, size, seed):
+        call_command('flush', interactive=False, verbosity=0)
+        cache.clear()
+        created = generate_dataset(
+            users=max(size // 50, 5),
+            birthdays=size,
+            tags=max(size // 100, 20),
+            congratulations=size * 2,
+            seed=seed,
+        )
+        self.stdout.write(
+            f'\nЗаписей: {created["birthdays"]}, пользователей: '
+            f'{created["users"]}, поздравлений: {created["congratulations"]}'
+        )
+        self.stdout.write(
+            f'{"сценарий":<14} {"p50, мс":>9} {"p90, мс":>9} '
+            f'{"p99, мс":>9} {"SQL":>5}'
+        )
+        results = {}
+        for name, func, setup in self.get_scenarios():
+            result = measure(func, self.repeat, setup=self.wrap_setup(setup))
+            results[name] = result
+            self.stdout.write(
+                f'{name:<14} {result["p50_ms"]:>9.2f} '
+                f'{result["p90_ms"]:>9.2f} {result["p99_ms"]:>9.2f} '
+                f'{result["queries"]:>5}'
+            )
+        return results
+
+    def wrap_setup(self, setup):
+        def prepare():
+            if not self.warm:
+                cache.clear()
+            return setup() if setup is not None else None
+        return prepare
+
+    def get_scenarios(self):
+        """Сценарии: имя, замеряемая функция и подготовка к ней."""
+        user = User.objects.create_user('bench')
+        client = Client()
+        client.force_login(user)
+        numbers = count()
+
+        def request(method, url, data=None, status=200):
+            response = getattr(client, method)(url, data)
+            if response.status_code != status:
+                raise CommandError(
+                    f'{method.upper()} {url}: ответ {response.status_code}, '
+                    f'ожидался {status}'
+                )
+
+        def new_birthday():
+            return Birthday.objects.create(
+                first_name='Бенч',
+                last_name=f'Запись{next(numbers)}',
+                birthday=date(1990, 1, 1),
+                author=user,
+            )
+
+        def birthday_data():
+            return {
+                'first_name': 'Бенч',
+                'last_name': f'Форма{next(numbers)}',
+                'birthday': '1990-01-01',
+                'confirm_duplicate': 'on',
+            }
+
+        list_url = reverse('birthday:list')
+        # Глубокая страница — на 90% длины списка.
+        ids = Birthday.objects.order_by('id').values_list('id', flat=True)
+        total = ids.count()
+        if getattr(settings, 'BIRTHDAY_LIST_PAGINATION', 'cursor') == 'cursor':
+            cursor = encode_cursor({'after': ids[total * 9 // 10]})
+            deep_url = f'{list_url}?cursor={cursor}'
+        else:
+            deep_url = f'{list_url}?page={total * 9 // 10 // 10 + 1}'
+        # Страница записи с наибольшим числом поздравлений.
+        popular_id = Congratulation.objects.values('birthday_id').annotate(
+            total=Count('id')
+        ).order_by('-total').values_list(
+            'birthday_id', flat=True
+        ).first() or new_birthday().pk
+        own = new_birthday()
+
+        return (
+            ('homepage', lambda _: request(
+                'get', reverse('pages:homepage')
+            ), None),
+            ('list', lambda _: request('get', list_url), None),
+            ('list_deep', lambda _: request('get', deep_url), None),
+            ('detail', lambda _: request(
+                'get', reverse('birthday:detail', args=(popular_id,))
+            ), None),
+            ('create', lambda data: request(
+                'post', reverse('birthday:create'), data, status=302
+            ), birthday_data),
+            ('edit', lambda data: request(
+                'post', reverse('birthday:edit', args=(own.pk,)), data,
+                status=302,
+            ), birthday_data),
+            ('delete', lambda birthday: request(
+                'post', reverse('birthday:delete', args=(birthday.pk,)),
+                status=302,
+            ), new_birthday),
+            ('add_comment', lambda _: request(
+                'post', reverse('birthday:add_comment', args=(popular_id,)),
+                {'text': 'С днём рождения!'}, status=302,
+            ), None),
+        )
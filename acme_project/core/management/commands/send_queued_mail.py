@@ -0,0 +1,59 @@
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand, CommandError
+
+from core.mail import send_queued_batch
+
+
+class Command(BaseCommand):
+    help = (
+        'Отправляет письма из очереди пачками через одно соединение '
+        'с почтовым сервером.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Не завершаться, а ждать новых писем.',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='Пауза между проверками очереди в режиме --loop, в секундах.',
+        )
+
+    def handle(self, *args, **options):
+        connection = get_connection(fail_silently=False)
+        delay = options['interval']
+        try:
+            while True:
+                try:
+                    # Соединение открывается один раз и переиспользуется;
+                    # для уже открытого open() ничего не делает.
+                    connection.open()
+                except OSError as error:
+                    if not options['loop']:
+                        raise CommandError(f'Нет соединения: {error}')
+                    self.stderr.write(f'Нет соединения: {error}')
+                    connection.close()
+                    time.sleep(delay)
+                    # Повторяем с нарастающей паузой, но не реже раза в 5 минут.
+                    delay = min(delay * 2, 300)
+                    continue
+                delay = options['interval']
+                sent, failed = send_queued_batch(
+                    connection, options['batch_size']
+                )
+                if sent or failed:
+                    self.stdout.write(
+                        f'Отправлено: {sent}, ошибок: {failed}'
+                    )
+                if sent + failed == options['batch_size']:
+                    # Очередь ещё не разобрана — берём следующую пачку сразу.
+                    continue
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        finally:
+            connection.close()
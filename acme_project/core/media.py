@@ -0,0 +1,68 @@
+import re
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class FileRange:
+    """
+    Окно [start, start + length) открытого файла, читаемое как файл.
+
+    fileno() и tell() отдают данные настоящего файла, поэтому
+    WSGI-сервер с sendfile() отправит окно без копирования в Python,
+    ограничившись заголовком Content-Length.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def tell(self):
+        return self.file.tell()
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def make_etag(stat):
+    """Сильный ETag из inode, размера и времени изменения файла."""
+    return f'"{stat.st_ino:x}-{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def parse_range(header, size):
+    """
+    Разбирает заголовок Range с одним диапазоном байтов.
+
+    Возвращает (start, length), None — если заголовок не задан
+    или не поддерживается (тогда отдаётся весь файл),
+    и ValueError — если диапазон нельзя удовлетворить.
+    """
+    match = RANGE_RE.match(header or '')
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # bytes=-N — последние N байтов.
+        length = min(int(last), size)
+        if length == 0:
+            raise ValueError('Пустой диапазон')
+        return size - length, length
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError('Диапазон за пределами файла')
+    return start, end - start + 1
@@ -0,0 +1,139 @@
+import copy
+import logging
+import re
+import threading
+from collections import Counter
+from contextlib import ExitStack
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Списки параметров в IN (...) разной длины дают одну форму запроса.
+PARAMS_LIST_RE = re.compile(r'\((?:%s, )*%s\)')
+
+# Статистика по именам представлений в памяти процесса.
+_views = {}
+_lock = threading.Lock()
+
+
+def get_query_shape(sql):
+    """Форма запроса: SQL без значений параметров."""
+    return PARAMS_LIST_RE.sub('(...)', sql)
+
+
+def get_repeated_shapes(shapes, threshold=None):
+    """Формы, повторившиеся threshold раз и больше: похоже на N+1."""
+    if threshold is None:
+        threshold = getattr(settings, 'QUERY_STATS_N1_THRESHOLD', 3)
+    return {
+        shape: count for shape, count in Counter(shapes).items()
+        if count >= threshold
+    }
+
+
+class QueryRecorder:
+    """Обёртка для connection.execute_wrapper(): считает запросы и время."""
+
+    def __init__(self):
+        self.shapes = []
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += perf_counter() - started
+            self.shapes.append(get_query_shape(sql))
+
+
+class ViewStats:
+
+    def __init__(self, view_name):
+        self.view_name = view_name
+        self.requests = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.duration = 0.0
+        self.n1_requests = 0
+        # Повторяющиеся формы запросов за всё время: форма -> максимум.
+        self.n1_shapes = {}
+
+    @property
+    def avg_queries(self):
+        return self.queries / self.requests if self.requests else 0
+
+    @property
+    def avg_duration_ms(self):
+        return self.duration * 1000 / self.requests if self.requests else 0
+
+    def add(self, recorder, repeated):
+        self.requests += 1
+        self.queries += len(recorder.shapes)
+        self.max_queries = max(self.max_queries, len(recorder.shapes))
+        self.duration += recorder.duration
+        if repeated:
+            self.n1_requests += 1
+            for shape, count in repeated.items():
+                self.n1_shapes[shape] = max(
+                    self.n1_shapes.get(shape, 0), count
+                )
+
+
+def get_query_stats():
+    """Копия статистики по представлениям, самые «тяжёлые» первыми."""
+    stats = []
+    with _lock:
+        for original in _views.values():
+            item = copy.copy(original)
+            item.n1_shapes = dict(original.n1_shapes)
+            stats.append(item)
+    return sorted(stats, key=lambda item: item.queries, reverse=True)
+
+
+def reset_query_stats():
+    with _lock:
+        _views.clear()
+
+
+class QueryStatsMiddleware:
+    """
+    Считает SQL-запросы и их время по имени представления
+    и отмечает запросы, в которых одна форма SQL повторяется (N+1).
+
+    Запросы, выполненные при отдаче StreamingHttpResponse,
+    в статистику не попадают: они идут уже после middleware.
+    При ASYNC_VIEWS middleware не подключается вовсе: асинхронные
+    представления ходят в БД из пула потоков, и execute_wrapper
+    запроса этих SQL не видит.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        match = request.resolver_match
+        if match is None:
+            return response
+        repeated = get_repeated_shapes(recorder.shapes)
+        if repeated:
+            logger.warning(
+                'Возможно N+1 в %s: %s', match.view_name,
+                '; '.join(
+                    f'{count}× {shape}' for shape, count in repeated.items()
+                ),
+            )
+        with _lock:
+            stats = _views.get(match.view_name)
+            if stats is None:
+                stats = _views[match.view_name] = ViewStats(match.view_name)
+            stats.add(recorder, repeated)
+        return response
@@ -0,0 +1,57 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Counter(models.Model):
+    """Поддерживаемый счётчик, чтобы не считать COUNT(*) на каждый запрос."""
+    name = models.CharField('Название', max_length=50, unique=True)
+    value = models.BigIntegerField('Значение', default=0)
+
+    class Meta:
+        verbose_name = 'счётчик'
+        verbose_name_plural = 'Счётчики'
+
+    def __str__(self):
+        return f'{self.name}: {self.value}'
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку (outbox)."""
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'Ожидает отправки'),
+        (SENT, 'Отправлено'),
+        (FAILED, 'Не отправлено'),
+    )
+
+    subject = models.CharField('Тема', max_length=255)
+    body = models.TextField('Текст')
+    from_email = models.CharField('Отправитель', max_length=254)
+    recipients = models.JSONField('Получатели')
+    status = models.CharField(
+        'Статус', max_length=10, choices=STATUS_CHOICES, default=PENDING
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    next_attempt_at = models.DateTimeField(
+        'Следующая попытка', default=timezone.now
+    )
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created_at = models.DateTimeField('Создано', auto_now_add=True)
+    sent_at = models.DateTimeField('Отправлено', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'письмо'
+        verbose_name_plural = 'Очередь писем'
+        indexes = (
+            # Обработчик выбирает только ожидающие письма по времени попытки.
+            models.Index(
+                fields=('next_attempt_at',),
+                condition=models.Q(status='pending'),
+                name='outbox_pending_idx',
+            ),
+        )
+
+    def __str__(self):
+        return self.subject
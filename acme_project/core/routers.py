@@ -0,0 +1,28 @@
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_DB_ALIAS = 'replica'
+
+
+class ReadOnlyReplicaRouter:
+    """
+    Чтение — через соединение только для чтения к тому же файлу,
+    запись и миграции — через основное соединение.
+
+    Внутри транзакции основного соединения читаем из него же:
+    иначе запрос не увидит ещё не закоммиченные изменения.
+    """
+
+    def db_for_read(self, model, **hints):
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return REPLICA_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Оба соединения открывают одну и ту же базу.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,35 @@
+from contextlib import ExitStack
+
+from django.db import connections
+
+from .middleware import QueryRecorder, get_repeated_shapes
+
+
+class QueryBudgetMixin:
+    """Проверки числа SQL-запросов страницы для TestCase."""
+
+    def assertQueryBudget(self, url, budget, n1_threshold=3, **kwargs):
+        """
+        Запрашивает url тестовым клиентом и проверяет, что страница
+        уложилась в budget запросов и ни одна форма запроса
+        не повторилась n1_threshold раз (N+1). Возвращает ответ.
+        """
+        recorder = QueryRecorder()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.client.get(url, **kwargs)
+        repeated = get_repeated_shapes(recorder.shapes, n1_threshold)
+        self.assertFalse(repeated, f'Похоже на N+1 на {url}:\n' + '\n'.join(
+            f'{count}× {shape}' for shape, count in repeated.items()
+        ))
+        listing = '\n'.join(
+            f'{number}. {sql}'
+            for number, sql in enumerate(recorder.shapes, start=1)
+        )
+        self.assertLessEqual(
+            len(recorder.shapes), budget,
+            f'{url}: {len(recorder.shapes)} запросов '
+            f'при бюджете {budget}:\n{listing}',
+        )
+        return response
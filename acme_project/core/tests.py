@@ -0,0 +1,340 @@
+import importlib
+import os
+import shutil
+import tempfile
+from datetime import date
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import (
+    SimpleTestCase, TestCase, TransactionTestCase, override_settings
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import clear_url_caches, reverse
+from django.utils import timezone
+
+import acme_project.urls
+import birthday.urls
+import pages.urls
+from birthday.models import Birthday
+
+from .counters import add_to_counter, forget_counter, get_counter
+from .db import set_sqlite_pragmas
+from .mail import claim_email, queue_mail, send_queued_batch
+from .middleware import (
+    get_query_shape, get_query_stats, get_repeated_shapes, reset_query_stats
+)
+from .models import Counter, OutgoingEmail
+from .routers import REPLICA_DB_ALIAS, ReadOnlyReplicaRouter
+
+User = get_user_model()
+
+
+class QueryStatsTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        reset_query_stats()
+
+    def test_query_shape(self):
+        self.assertEqual(
+            get_query_shape('SELECT 1 WHERE id IN (%s, %s, %s)'),
+            get_query_shape('SELECT 1 WHERE id IN (%s)'),
+        )
+        self.assertEqual(
+            get_repeated_shapes(['a', 'b', 'a', 'a'], threshold=3), {'a': 3}
+        )
+
+    def test_stats_by_view_name(self):
+        self.client.get(reverse('birthday:list'))
+        self.client.get(reverse('birthday:list'))
+        stats = {view.view_name: view for view in get_query_stats()}
+        self.assertEqual(stats['birthday:list'].requests, 2)
+        self.assertGreater(stats['birthday:list'].queries, 0)
+
+    def test_stats_page_for_staff_only(self):
+        url = reverse('query_stats')
+        user = User.objects.create_user('user')
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(url).status_code, 302)
+        user.is_staff = True
+        user.save()
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class ServeMediaTest(TestCase):
+    """Отдача файлов из MEDIA_ROOT: Range, ETag и защита от выхода из неё."""
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        media_root = os.path.join(root, 'media')
+        os.makedirs(os.path.join(media_root, 'images'))
+        with open(os.path.join(media_root, 'file.txt'), 'wb') as file:
+            file.write(b'0123456789')
+        # Файл рядом с MEDIA_ROOT, но не в ней.
+        with open(os.path.join(root, 'secret.txt'), 'wb') as file:
+            file.write(b'secret')
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.url = reverse('media', kwargs={'path': 'file.txt'})
+
+    def get(self, url=None, **headers):
+        response = self.client.get(url or self.url, **headers)
+        self.addCleanup(response.close)
+        return response
+
+    def test_full_file(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertTrue(response['ETag'])
+
+    def test_range(self):
+        response = self.get(HTTP_RANGE='bytes=2-4')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), b'234')
+        self.assertEqual(response['Content-Range'], 'bytes 2-4/10')
+        response = self.get(HTTP_RANGE='bytes=-3')
+        self.assertEqual(b''.join(response.streaming_content), b'789')
+
+    def test_unsatisfiable_range(self):
+        response = self.get(HTTP_RANGE='bytes=20-30')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */10')
+
+    def test_not_modified(self):
+        etag = self.get()['ETag']
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_if_range_mismatch(self):
+        # Файл у клиента устарел: отдаём его целиком, а не кусок.
+        response = self.get(HTTP_RANGE='bytes=2-4', HTTP_IF_RANGE='"old"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+
+    def test_not_found(self):
+        for path in ('missing.txt', 'images', '../secret.txt', '/etc/hosts'):
+            with self.subTest(path=path):
+                response = self.get(settings.MEDIA_URL + path)
+                self.assertEqual(response.status_code, 404)
+
+    @override_settings(MEDIA_SERVE_MODE='x-accel-redirect')
+    def test_accel_redirect(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response['X-Accel-Redirect'], '/protected-media/file.txt'
+        )
+        self.assertEqual(response.content, b'')
+
+
+def reload_urls():
+    # Выбор синхронных или асинхронных представлений делается
+    # при импорте urls: перечитываем модули под текущие настройки.
+    importlib.reload(birthday.urls)
+    importlib.reload(pages.urls)
+    importlib.reload(acme_project.urls)
+    clear_url_caches()
+
+
+@override_settings(
+    ASYNC_VIEWS=True,
+    BIRTHDAY_LIST_PAGINATION='page',
+    MIDDLEWARE=[
+        name for name in settings.MIDDLEWARE
+        if name != 'core.middleware.QueryStatsMiddleware'
+    ],
+)
+class AsyncViewsTest(TransactionTestCase):
+    """Главная, список и запись под ASGI: ASYNC_VIEWS=True и AsyncClient."""
+
+    def setUp(self):
+        reload_urls()
+        self.addCleanup(reload_urls)
+        self.birthday = Birthday.objects.create(
+            first_name='Иван', birthday=date(1990, 5, 17)
+        )
+
+    async def test_pages(self):
+        for url in (
+            reverse('pages:homepage'),
+            reverse('birthday:list'),
+            reverse('birthday:detail', args=(self.birthday.pk,)),
+        ):
+            with self.subTest(url=url):
+                response = await self.async_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    response.resolver_match.func.view_class.__name__[:5],
+                    'Async',
+                )
+
+    async def test_not_found(self):
+        for url in (
+            reverse('birthday:detail', args=(self.birthday.pk + 1,)),
+            reverse('birthday:list') + '?page=100',
+        ):
+            with self.subTest(url=url):
+                response = await self.async_client.get(url)
+                self.assertEqual(response.status_code, 404)
+
+
+class ReadOnlyReplicaRouterTest(TransactionTestCase):
+    """Чтение вне транзакции — с реплики, запись и миграции — в default."""
+
+    def setUp(self):
+        self.router = ReadOnlyReplicaRouter()
+
+    def test_read(self):
+        self.assertEqual(
+            self.router.db_for_read(Birthday), REPLICA_DB_ALIAS
+        )
+        with transaction.atomic():
+            self.assertEqual(
+                self.router.db_for_read(Birthday), DEFAULT_DB_ALIAS
+            )
+
+    def test_write(self):
+        self.assertEqual(
+            self.router.db_for_write(Birthday), DEFAULT_DB_ALIAS
+        )
+        self.assertTrue(self.router.allow_migrate(DEFAULT_DB_ALIAS, 'core'))
+        self.assertFalse(self.router.allow_migrate(REPLICA_DB_ALIAS, 'core'))
+
+
+@override_settings(SQLITE_PRAGMAS={
+    'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'busy_timeout': 5000,
+})
+class SqlitePragmasTest(SimpleTestCase):
+    """Прагмы из SQLITE_PRAGMAS выставляются каждому новому соединению."""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'db.sqlite3')
+
+    def connect(self, name, **options):
+        settings_dict = {
+            **connections[DEFAULT_DB_ALIAS].settings_dict,
+            'NAME': name,
+            'OPTIONS': options,
+        }
+        connection = DatabaseWrapper(settings_dict, alias='pragmas')
+        self.addCleanup(connection.close)
+        connection.ensure_connection()
+        return connection
+
+    def get_pragma(self, connection, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied(self):
+        connection = self.connect(self.path)
+        self.assertEqual(self.get_pragma(connection, 'journal_mode'), 'wal')
+        # NORMAL — это 1.
+        self.assertEqual(self.get_pragma(connection, 'synchronous'), 1)
+        self.assertEqual(self.get_pragma(connection, 'busy_timeout'), 5000)
+
+    def test_read_only_skips_write_pragmas(self):
+        self.connect(self.path).close()
+        uri = f'file:{self.path}?mode=ro'
+        connection = self.connect(uri, uri=True)
+        with CaptureQueriesContext(connection) as queries:
+            set_sqlite_pragmas(sender=None, connection=connection)
+        executed = [query['sql'] for query in queries]
+        self.assertEqual(executed, [
+            'PRAGMA synchronous = NORMAL', 'PRAGMA busy_timeout = 5000',
+        ])
+
+    def test_other_vendor_ignored(self):
+        connection = type('Connection', (), {'vendor': 'postgresql'})()
+        # До курсора дело не доходит: у заглушки его нет.
+        set_sqlite_pragmas(sender=None, connection=connection)
+
+
+class CounterTest(TestCase):
+
+    def setUp(self):
+        forget_counter('test')
+
+    def test_created_before_default(self):
+        def default():
+            # Строка уже есть: прибавления из других процессов не теряются.
+            self.assertTrue(Counter.objects.filter(name='test').exists())
+            return 5
+
+        self.assertEqual(get_counter('test', default=default), 5)
+        add_to_counter('test', 1)
+        self.assertEqual(get_counter('test', default=default), 6)
+
+
+class BrokenConnection:
+    """Почтовое соединение, на котором любая отправка падает."""
+
+    def send_messages(self, messages):
+        raise OSError('connection refused')
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    OUTBOX_MAX_ATTEMPTS=2,
+)
+class OutboxTest(TestCase):
+    """Очередь писем: отправка, повтор, отказ и захват обработчиком."""
+
+    def setUp(self):
+        self.email = queue_mail('Тема', 'Текст', 'from@acme.ru', ['to@a.ru'])
+
+    def test_send(self):
+        self.assertEqual(send_queued_batch(mail.get_connection()), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['to@a.ru'])
+        self.email.refresh_from_db()
+        self.assertEqual(self.email.status, OutgoingEmail.SENT)
+        self.assertEqual(self.email.attempts, 1)
+        self.assertIsNotNone(self.email.sent_at)
+        # Отправленное письмо второй раз не уходит.
+        self.assertEqual(send_queued_batch(mail.get_connection()), (0, 0))
+
+    def test_retry_and_fail(self):
+        self.assertEqual(send_queued_batch(BrokenConnection()), (0, 1))
+        self.email.refresh_from_db()
+        self.assertEqual(self.email.status, OutgoingEmail.PENDING)
+        self.assertEqual(self.email.attempts, 1)
+        self.assertIn('connection refused', self.email.last_error)
+        self.assertGreater(self.email.next_attempt_at, timezone.now())
+        # До срока повтора письмо не трогаем.
+        self.assertEqual(send_queued_batch(BrokenConnection()), (0, 0))
+        OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(send_queued_batch(BrokenConnection()), (0, 1))
+        self.email.refresh_from_db()
+        self.assertEqual(self.email.status, OutgoingEmail.FAILED)
+        self.assertEqual(self.email.attempts, 2)
+
+    def test_claimed_once(self):
+        stale = OutgoingEmail.objects.get(pk=self.email.pk)
+        now = timezone.now()
+        self.assertTrue(claim_email(self.email, now))
+        # Второй обработчик прочитал письмо до захвата и опоздал.
+        self.assertFalse(claim_email(stale, now))
+
+    def test_claimed_by_other_worker(self):
+        def claim_after_other_worker(email, now):
+            # Другой обработчик успел забрать письмо после нашей выборки.
+            claim_email(OutgoingEmail.objects.get(pk=email.pk), now)
+            return claim_email(email, now)
+
+        with mock.patch('core.mail.claim_email', claim_after_other_worker):
+            self.assertEqual(send_queued_batch(mail.get_connection()), (0, 0))
+        self.assertEqual(mail.outbox, [])
@@ -1,4 +1,22 @@
-from django.shortcuts import render
+import mimetypes
+import os
+import stat as stat_module
+from urllib.parse import quote
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.shortcuts import redirect, render
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+from birthday.cache import get_stats as get_cache_stats
+
+from .media import FileRange, make_etag, parse_range
+from .middleware import get_query_stats, reset_query_stats
 
 
 def page_not_found(request, exception):
@@ -8,4 +26,98 @@ def page_not_found(request, exception):
 
 
 def csrf_failure(request, reason=''):
-    return render(request, 'core/403csrf.html', status=403) 
+    return render(request, 'core/403csrf.html', status=403)
+
+
+@staff_member_required
+def query_stats(request):
+    # Статистика SQL по представлениям из QueryStatsMiddleware.
+    if request.method == 'POST':
+        reset_query_stats()
+        return redirect('query_stats')
+    return render(request, 'core/query_stats.html', {
+        'async_views': settings.ASYNC_VIEWS,
+        'views': get_query_stats(),
+        'cache_stats': sorted(get_cache_stats().items()),
+    })
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Отдаёт файлы из MEDIA_ROOT в продакшене.
+
+    Поддерживает Range, ETag и Last-Modified с ответами 304,
+    а в режимах MEDIA_SERVE_MODE 'x-accel-redirect' и 'x-sendfile'
+    передаёт саму отправку файла веб-серверу.
+    """
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        file_stat = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404('Файл не найден')
+    if not stat_module.S_ISREG(file_stat.st_mode):
+        raise Http404('Файл не найден')
+    etag = make_etag(file_stat)
+    last_modified = int(file_stat.st_mtime)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        content_type, encoding = mimetypes.guess_type(full_path)
+        response = _make_media_response(
+            request, path, full_path, file_stat.st_size, etag,
+            last_modified, content_type or 'application/octet-stream',
+        )
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def _make_media_response(
+    request, path, full_path, size, etag, last_modified, content_type
+):
+    mode = getattr(settings, 'MEDIA_SERVE_MODE', 'direct')
+    if mode == 'x-accel-redirect':
+        # nginx сам отдаст файл из internal-локации, в том числе Range.
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = quote(
+            settings.MEDIA_ACCEL_REDIRECT_PREFIX + path
+        )
+        return response
+    if mode == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = full_path
+        return response
+
+    byte_range = None
+    if_range = request.META.get('HTTP_IF_RANGE')
+    # Диапазон отдаём, только если у клиента та же версия файла.
+    if not if_range or if_range == etag or (
+        parse_http_date_safe(if_range) == last_modified
+    ):
+        try:
+            byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    file = open(full_path, 'rb')
+    if byte_range is None:
+        # FileResponse отдаёт файл через wsgi.file_wrapper,
+        # то есть через os.sendfile(), если сервер его поддерживает.
+        response = FileResponse(file, content_type=content_type)
+    else:
+        start, length = byte_range
+        response = FileResponse(
+            FileRange(file, start, length),
+            status=206,
+            content_type=content_type,
+        )
+        response['Content-Length'] = length
+        response['Content-Range'] = (
+            f'bytes {start}-{start + length - 1}/{size}'
+        )
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -0,0 +1,21 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from birthday.models import BIRTHDAY_COUNTER
+from core.counters import forget_counter
+from core.testing import QueryBudgetMixin
+
+
+class HomePageQueryBudgetTest(QueryBudgetMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        forget_counter(BIRTHDAY_COUNTER)
+
+    def test_homepage(self):
+        # Первое обращение: чтение счётчика, затем в одной транзакции
+        # (с SAVEPOINT и RELEASE) создание счётчика, COUNT(*) и запись.
+        self.assertQueryBudget(reverse('pages:homepage'), 6)
+        # Дальше значение берётся из памяти процесса.
+        self.assertQueryBudget(reverse('pages:homepage'), 0)
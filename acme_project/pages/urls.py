@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path
 
 from . import views
@@ -6,5 +7,10 @@ app_name = 'pages'
 
 urlpatterns = [
     # path('', views.homepage, name='homepage'),
-    path('', views.HomePage.as_view(), name='homepage'),
+    path(
+        '',
+        (views.AsyncHomePage if settings.ASYNC_VIEWS else views.HomePage)
+        .as_view(),
+        name='homepage'
+    ),
 ]
@@ -2,7 +2,9 @@
 # Импортируем класс TemplateView, чтобы унаследоваться от него.
 from django.views.generic import TemplateView
 
-from birthday.models import Birthday
+from birthday.models import BIRTHDAY_COUNTER, Birthday
+from core.async_db import AsyncViewMixin
+from core.counters import get_counter
 
 # def homepage(request):
 #     return render(request, 'pages/index.html')
@@ -18,6 +20,15 @@ class HomePage(TemplateView):
         context = super().get_context_data(**kwargs)
         # Добавляем в словарь ключ total_count;
         # значение ключа — число объектов модели Birthday.
-        context['total_count'] = Birthday.objects.count()
+        # Берём его из поддерживаемого счётчика, а не через COUNT(*):
+        # полный подсчёт нужен только при первом обращении.
+        context['total_count'] = get_counter(
+            BIRTHDAY_COUNTER, default=Birthday.objects.count
+        )
         # Возвращаем изменённый словарь контекста.
-        return context 
+        return context
+
+
+class AsyncHomePage(AsyncViewMixin, HomePage):
+    # Для ASGI: счётчик и шаблон — в пуле потоков БД.
+    pass
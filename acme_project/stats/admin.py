@@ -0,0 +1,11 @@
+from django.contrib import admin
+
+from .models import (
+    BirthMonthStat, BirthYearStat, CongratulationDayStat, TagStat
+)
+
+
+admin.site.register(BirthYearStat)
+admin.site.register(BirthMonthStat)
+admin.site.register(TagStat)
+admin.site.register(CongratulationDayStat)
@@ -0,0 +1,151 @@
+"""
+Поддержка сводных таблиц статистики.
+
+Изменения копятся в словарях «ключ → прирост» и применяются
+одним UPDATE на каждый прирост, недостающие строки создаются
+пачкой. Изменения приходят из сигналов (stats.signals): одиночные —
+из post_save и post_delete, массовые вставки — из bulk_created.
+"""
+from collections import Counter, defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import ExtractMonth, ExtractYear, TruncDate
+from django.utils import timezone
+
+from birthday.models import Birthday, Congratulation
+
+from .models import (
+    BirthMonthStat, BirthYearStat, CongratulationDayStat, TagStat
+)
+
+# Ключевое поле каждой таблицы статистики.
+STAT_KEYS = {
+    BirthYearStat: 'year',
+    BirthMonthStat: 'month',
+    TagStat: 'tag_id',
+    CongratulationDayStat: 'day',
+}
+
+
+def apply_deltas(model, field, deltas):
+    """Прибавляет к счётчикам model приросты deltas {ключ: прирост}."""
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    if len(deltas) == 1:
+        # Изменение из сигнала: обычно хватает одного UPDATE.
+        [(key, delta)] = deltas.items()
+        if model.objects.filter(**{field: key}).update(
+            count=F('count') + delta
+        ):
+            return
+        try:
+            with transaction.atomic():
+                model.objects.create(**{field: key, 'count': delta})
+        except IntegrityError:
+            # Строку успел создать другой процесс: теперь она есть.
+            apply_deltas(model, field, deltas)
+        return
+    with transaction.atomic():
+        existing = set(model.objects.filter(
+            **{f'{field}__in': deltas}
+        ).values_list(field, flat=True))
+        keys_by_delta = defaultdict(list)
+        for key in existing:
+            keys_by_delta[deltas[key]].append(key)
+        for delta, keys in keys_by_delta.items():
+            model.objects.filter(**{f'{field}__in': keys}).update(
+                count=F('count') + delta
+            )
+        missing = [key for key in deltas if key not in existing]
+        if not missing:
+            return
+        try:
+            with transaction.atomic():
+                model.objects.bulk_create(
+                    model(**{field: key, 'count': deltas[key]})
+                    for key in missing
+                )
+        except IntegrityError:
+            # Часть строк успел создать другой процесс.
+            for key in missing:
+                apply_deltas(model, field, {key: deltas[key]})
+
+
+def add_birthdays(dates, sign=1):
+    """Учитывает записи с датами рождения dates (sign=-1 — удаление)."""
+    years = Counter()
+    months = Counter()
+    for birthday in dates:
+        years[birthday.year] += sign
+        months[birthday.month] += sign
+    apply_deltas(BirthYearStat, 'year', years)
+    apply_deltas(BirthMonthStat, 'month', months)
+
+
+def add_tag_links(tag_ids, sign=1):
+    """Учитывает связи записей с тегами: по id тега на каждую связь."""
+    deltas = Counter()
+    for tag_id in tag_ids:
+        deltas[tag_id] += sign
+    apply_deltas(TagStat, 'tag_id', deltas)
+
+
+def add_congratulations(created_at, sign=1):
+    """Учитывает поздравления по моментам их создания created_at."""
+    deltas = Counter()
+    for moment in created_at:
+        deltas[timezone.localdate(moment)] += sign
+    apply_deltas(CongratulationDayStat, 'day', deltas)
+
+
+def count_totals():
+    """Полный пересчёт: {модель: {ключ: число}} по исходным данным."""
+    def group(queryset, key, expression=None):
+        if expression is not None:
+            queryset = queryset.annotate(**{key: expression})
+        return dict(
+            queryset.values(key).annotate(total=Count('pk')).order_by()
+            .values_list(key, 'total')
+        )
+
+    birthdays = Birthday.objects.all()
+    return {
+        BirthYearStat: group(birthdays, 'year', ExtractYear('birthday')),
+        BirthMonthStat: group(
+            birthdays, 'month', ExtractMonth('birthday')
+        ),
+        TagStat: group(Birthday.tags.through.objects.all(), 'tag_id'),
+        CongratulationDayStat: group(
+            Congratulation.objects.all(), 'day', TruncDate('created_at')
+        ),
+    }
+
+
+def rebuild():
+    """
+    Пересчитывает все таблицы статистики по исходным данным.
+
+    Возвращает {имя таблицы: число ключей, где счётчик расходился}.
+    """
+    totals = count_totals()
+    drift = {}
+    with transaction.atomic():
+        for model, field in STAT_KEYS.items():
+            name = model.__name__
+            counts = totals[model]
+            stored = dict(model.objects.values_list(field, 'count'))
+            drift[name] = sum(
+                stored.get(key, 0) != counts.get(key, 0)
+                for key in stored.keys() | counts.keys()
+            )
+            model.objects.all().delete()
+            model.objects.bulk_create(
+                (
+                    model(**{field: key, 'count': count})
+                    for key, count in counts.items()
+                ),
+                batch_size=500,
+            )
+    return drift
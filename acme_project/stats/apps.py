@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class StatsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'stats'
+    verbose_name = 'Статистика'
+
+    def ready(self):
+        # Подключаем обработчики сигналов.
+        from . import signals  # noqa: F401
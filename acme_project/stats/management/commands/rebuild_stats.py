@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from stats.aggregates import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает сводные таблицы статистики по исходным данным '
+        'и исправляет расхождения. Рассчитана на ночной запуск.'
+    )
+
+    def handle(self, *args, **options):
+        drift = rebuild()
+        for name, changed in drift.items():
+            if changed:
+                self.stdout.write(self.style.WARNING(
+                    f'{name}: исправлено ключей: {changed}'
+                ))
+            else:
+                self.stdout.write(
+                    self.style.SUCCESS(f'{name}: расхождений нет')
+                )
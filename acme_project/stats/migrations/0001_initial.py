@@ -0,0 +1,95 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:19
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import ExtractMonth, ExtractYear, TruncDate
+import django.db.models.deletion
+
+
+def fill_stats(apps, schema_editor):
+    """Заполняет таблицы по уже существующим данным."""
+    Birthday = apps.get_model('birthday', 'Birthday')
+    Congratulation = apps.get_model('birthday', 'Congratulation')
+    birthdays = Birthday.objects.all()
+    sources = (
+        ('BirthYearStat', 'year', birthdays, ExtractYear('birthday')),
+        ('BirthMonthStat', 'month', birthdays, ExtractMonth('birthday')),
+        ('TagStat', 'tag_id', Birthday.tags.through.objects.all(), None),
+        (
+            'CongratulationDayStat', 'day', Congratulation.objects.all(),
+            TruncDate('created_at'),
+        ),
+    )
+    for name, key, queryset, expression in sources:
+        if expression is not None:
+            queryset = queryset.annotate(**{key: expression})
+        counts = queryset.values(key).annotate(
+            total=Count('pk')
+        ).order_by().values_list(key, 'total')
+        model = apps.get_model('stats', name)
+        model.objects.bulk_create(
+            (model(**{key: value, 'count': total}) for value, total in counts),
+            batch_size=500,
+        )
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('birthday', '0011_reminders'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BirthMonthStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.PositiveSmallIntegerField(unique=True, verbose_name='Месяц рождения')),
+                ('count', models.IntegerField(default=0, verbose_name='Записей')),
+            ],
+            options={
+                'verbose_name': 'записи по месяцу рождения',
+                'verbose_name_plural': 'Записи по месяцам рождения',
+            },
+        ),
+        migrations.CreateModel(
+            name='BirthYearStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField(unique=True, verbose_name='Год рождения')),
+                ('count', models.IntegerField(default=0, verbose_name='Записей')),
+            ],
+            options={
+                'verbose_name': 'записи по году рождения',
+                'verbose_name_plural': 'Записи по годам рождения',
+            },
+        ),
+        migrations.CreateModel(
+            name='CongratulationDayStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True, verbose_name='День')),
+                ('count', models.IntegerField(default=0, verbose_name='Поздравлений')),
+            ],
+            options={
+                'verbose_name': 'поздравления за день',
+                'verbose_name_plural': 'Поздравления по дням',
+            },
+        ),
+        migrations.CreateModel(
+            name='TagStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.IntegerField(default=0, verbose_name='Записей')),
+                ('tag', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stat', to='birthday.tag', verbose_name='Тег')),
+            ],
+            options={
+                'verbose_name': 'записи по тегу',
+                'verbose_name_plural': 'Записи по тегам',
+                'indexes': [models.Index(fields=['-count'], name='tagstat_count_idx')],
+            },
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,69 @@
+"""
+Сводные таблицы статистики.
+
+Каждая строка — число объектов с данным значением ключа. Таблицы
+поддерживаются сигналами (stats.signals), а команда rebuild_stats
+пересчитывает их заново.
+"""
+from django.db import models
+
+
+class BirthYearStat(models.Model):
+    """Число записей о днях рождения по году рождения."""
+    year = models.PositiveSmallIntegerField('Год рождения', unique=True)
+    count = models.IntegerField('Записей', default=0)
+
+    class Meta:
+        verbose_name = 'записи по году рождения'
+        verbose_name_plural = 'Записи по годам рождения'
+
+    def __str__(self):
+        return f'{self.year}: {self.count}'
+
+
+class BirthMonthStat(models.Model):
+    """Число записей о днях рождения по месяцу рождения."""
+    month = models.PositiveSmallIntegerField('Месяц рождения', unique=True)
+    count = models.IntegerField('Записей', default=0)
+
+    class Meta:
+        verbose_name = 'записи по месяцу рождения'
+        verbose_name_plural = 'Записи по месяцам рождения'
+
+    def __str__(self):
+        return f'{self.month}: {self.count}'
+
+
+class TagStat(models.Model):
+    """Число записей с тегом."""
+    tag = models.OneToOneField(
+        'birthday.Tag',
+        on_delete=models.CASCADE,
+        related_name='stat',
+        verbose_name='Тег',
+    )
+    count = models.IntegerField('Записей', default=0)
+
+    class Meta:
+        verbose_name = 'записи по тегу'
+        verbose_name_plural = 'Записи по тегам'
+        indexes = (
+            # Популярные теги читаются по убыванию числа записей.
+            models.Index(fields=('-count',), name='tagstat_count_idx'),
+        )
+
+    def __str__(self):
+        return f'{self.tag}: {self.count}'
+
+
+class CongratulationDayStat(models.Model):
+    """Число поздравлений за день."""
+    day = models.DateField('День', unique=True)
+    count = models.IntegerField('Поздравлений', default=0)
+
+    class Meta:
+        verbose_name = 'поздравления за день'
+        verbose_name_plural = 'Поздравления по дням'
+
+    def __str__(self):
+        return f'{self.day}: {self.count}'
@@ -0,0 +1,86 @@
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_delete
+)
+from django.dispatch import receiver
+
+from birthday.models import Birthday, Congratulation
+from birthday.signals import bulk_created
+
+from .aggregates import add_birthdays, add_congratulations, add_tag_links
+
+
+@receiver(post_save, sender=Birthday)
+def count_saved_birthday(sender, instance, created, **kwargs):
+    if created:
+        add_birthdays([instance.birthday])
+        return
+    loaded = getattr(instance, '_loaded_birthday', None)
+    if loaded is not None and loaded != instance.birthday:
+        add_birthdays([loaded], sign=-1)
+        add_birthdays([instance.birthday])
+
+
+@receiver(bulk_created, sender=Birthday)
+def count_bulk_birthdays(sender, objects, **kwargs):
+    add_birthdays(birthday.birthday for birthday in objects)
+
+
+@receiver(bulk_created, sender=Birthday.tags.through)
+def count_bulk_tag_links(sender, objects, **kwargs):
+    add_tag_links(link.tag_id for link in objects)
+
+
+@receiver(pre_delete, sender=Birthday)
+def remember_birthday_tags(sender, instance, **kwargs):
+    # Связи с тегами удаляются каскадом, без m2m_changed.
+    instance._stat_tag_ids = list(
+        instance.tags.values_list('id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Birthday)
+def count_deleted_birthday(sender, instance, **kwargs):
+    add_birthdays([instance.birthday], sign=-1)
+    add_tag_links(getattr(instance, '_stat_tag_ids', ()), sign=-1)
+
+
+@receiver(m2m_changed, sender=Birthday.tags.through)
+def count_tag_links(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        # После очистки связей их уже не пересчитать.
+        if reverse:
+            instance._stat_cleared_links = [instance.pk] * (
+                instance.birthday_set.count()
+            )
+        else:
+            instance._stat_cleared_links = list(
+                instance.tags.values_list('id', flat=True)
+            )
+        return
+    if action == 'post_clear':
+        add_tag_links(instance._stat_cleared_links, sign=-1)
+        return
+    if action not in ('post_add', 'post_remove') or not pk_set:
+        return
+    sign = 1 if action == 'post_add' else -1
+    if reverse:
+        # Связи меняли со стороны тега: pk_set — это id записей.
+        add_tag_links([instance.pk] * len(pk_set), sign)
+    else:
+        add_tag_links(pk_set, sign)
+
+
+@receiver(post_save, sender=Congratulation)
+def count_created_congratulation(sender, instance, created, **kwargs):
+    if created:
+        add_congratulations([instance.created_at])
+
+
+@receiver(bulk_created, sender=Congratulation)
+def count_bulk_congratulations(sender, objects, **kwargs):
+    add_congratulations(item.created_at for item in objects)
+
+
+@receiver(post_delete, sender=Congratulation)
+def count_deleted_congratulation(sender, instance, **kwargs):
+    add_congratulations([instance.created_at], sign=-1)
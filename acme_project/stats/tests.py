@@ -0,0 +1,83 @@
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from birthday.datasets import generate_dataset
+from birthday.models import Birthday, Congratulation, Tag
+
+from .aggregates import rebuild
+from .models import (
+    BirthMonthStat, BirthYearStat, CongratulationDayStat, TagStat
+)
+from .views import CONGRATULATION_DAYS
+
+User = get_user_model()
+
+
+class StatsTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('user')
+        cls.tags = [Tag.objects.create(tag=name) for name in ('а', 'б')]
+
+    def assertNoDrift(self):
+        # Пересчёт с нуля совпадает с тем, что накопили сигналы.
+        self.assertEqual(set(rebuild().values()), {0})
+
+    def test_incremental_updates(self):
+        first = Birthday.objects.create(
+            first_name='Иван', birthday=date(1990, 5, 17), author=self.user
+        )
+        second = Birthday.objects.create(
+            first_name='Анна', birthday=date(1992, 2, 29), author=self.user
+        )
+        first.tags.set(self.tags)
+        second.tags.add(self.tags[0])
+        Congratulation.objects.create(
+            birthday=first, author=self.user, text='Ура!'
+        )
+        self.assertEqual(TagStat.objects.get(tag=self.tags[0]).count, 2)
+        self.assertNoDrift()
+
+        first.birthday = date(1985, 1, 1)
+        first.save()
+        first.tags.remove(self.tags[1])
+        self.tags[0].birthday_set.clear()
+        self.assertEqual(BirthYearStat.objects.get(year=1990).count, 0)
+        self.assertNoDrift()
+
+        first.tags.add(*self.tags)
+        first.delete()
+        self.assertEqual(BirthMonthStat.objects.get(month=1).count, 0)
+        self.assertNoDrift()
+
+        generate_dataset(
+            users=2, birthdays=50, tags=5, congratulations=100, seed=1
+        )
+        self.assertNoDrift()
+
+    def test_summary(self):
+        generate_dataset(
+            users=2, birthdays=50, tags=5, congratulations=100, seed=1
+        )
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('stats:summary'))
+        data = response.json()
+        self.assertEqual(
+            sum(item['count'] for item in data['ages']),
+            Birthday.objects.count(),
+        )
+        self.assertEqual(len(data['months']), 12)
+        # Поздравления разнесены по дням, в панели — только последние.
+        self.assertGreater(CongratulationDayStat.objects.count(), 1)
+        start = timezone.localdate() - timedelta(days=CONGRATULATION_DAYS - 1)
+        self.assertEqual(
+            sum(item['count'] for item in data['congratulations']),
+            Congratulation.objects.filter(created_at__date__gte=start).count(),
+        )
+        response = self.client.get(reverse('stats:dashboard'))
+        self.assertContains(response, 'Популярные теги')
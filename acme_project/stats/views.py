@@ -0,0 +1,80 @@
+from collections import Counter
+from datetime import date, timedelta
+
+from django.http import JsonResponse
+from django.shortcuts import render
+from django.utils.dates import MONTHS
+from django.views.decorators.http import require_safe
+
+from .models import (
+    BirthMonthStat, BirthYearStat, CongratulationDayStat, TagStat
+)
+
+# Ширина возрастной группы в годах.
+AGE_BUCKET = 10
+# Сколько популярных тегов показывать.
+TOP_TAGS = 10
+# За сколько последних дней показывать поздравления.
+CONGRATULATION_DAYS = 30
+
+
+def get_summary(today=None):
+    """
+    Сводка для панели статистики.
+
+    Читает только сводные таблицы stats — по запросу на каждую,
+    без агрегатов по записям и поздравлениям.
+    """
+    if today is None:
+        today = date.today()
+    # Возраст — тот, что исполнится в этом году.
+    ages = Counter()
+    for year, count in BirthYearStat.objects.filter(
+        count__gt=0
+    ).values_list('year', 'count'):
+        ages[(today.year - year) // AGE_BUCKET * AGE_BUCKET] += count
+    months = dict(BirthMonthStat.objects.values_list('month', 'count'))
+    tags = TagStat.objects.filter(count__gt=0).select_related(
+        'tag'
+    ).order_by('-count', 'tag_id')[:TOP_TAGS]
+    start = today - timedelta(days=CONGRATULATION_DAYS - 1)
+    days = dict(CongratulationDayStat.objects.filter(
+        day__range=(start, today)
+    ).values_list('day', 'count'))
+    return {
+        'ages': [
+            {'from': age, 'to': age + AGE_BUCKET - 1, 'count': ages[age]}
+            for age in sorted(ages)
+        ],
+        'months': [
+            {'month': month, 'name': str(name), 'count': months.get(month, 0)}
+            for month, name in MONTHS.items()
+        ],
+        'tags': [
+            {'id': stat.tag_id, 'tag': stat.tag.tag, 'count': stat.count}
+            for stat in tags
+        ],
+        'congratulations': [
+            {'day': day.isoformat(), 'count': days.get(day, 0)}
+            for day in (
+                start + timedelta(days=offset)
+                for offset in range(CONGRATULATION_DAYS)
+            )
+        ],
+    }
+
+
+@require_safe
+def dashboard(request):
+    summary = get_summary()
+    # Ширина полос на графиках — от наибольшего значения в разделе.
+    for section in summary.values():
+        peak = max((item['count'] for item in section), default=0)
+        for item in section:
+            item['percent'] = item['count'] * 100 // peak if peak else 0
+    return render(request, 'stats/dashboard.html', summary)
+
+
+@require_safe
+def summary(request):
+    return JsonResponse(get_summary())
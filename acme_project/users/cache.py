@@ -0,0 +1,72 @@
+"""
+Кеш пользователей для CachedAuthenticationMiddleware.
+
+Ключ — id пользователя, номер версии и хеш сессии (он выводится
+из хеша пароля). Версию увеличивают сохранение пользователя
+(в том числе смена пароля и last_login при входе) и выход.
+
+Из кеша пользователь берётся без backend.get_user(), поэтому
+изменения в обход save() — например, User.objects.filter(...)
+.update(is_active=False) — не видны до истечения USER_CACHE_TTL.
+После таких массовых изменений вызывайте invalidate_user().
+"""
+import time
+
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+)
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.utils.crypto import constant_time_compare
+
+
+def _version_key(user_id):
+    return f'users:user:{user_id}:version'
+
+
+def _get_version(user_id):
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key, time.time_ns())
+    return version
+
+
+def invalidate_user(user_id):
+    try:
+        cache.incr(_version_key(user_id))
+    except ValueError:
+        cache.set(_version_key(user_id), time.time_ns(), None)
+
+
+def get_cached_user(request):
+    """
+    То же, что django.contrib.auth.get_user(), но пользователь
+    берётся из кеша, а сессия проверяется по его хешу пароля.
+    """
+    session = request.session
+    try:
+        user_id = get_user_model()._meta.pk.to_python(session[SESSION_KEY])
+        backend_path = session[BACKEND_SESSION_KEY]
+        session_hash = session[HASH_SESSION_KEY]
+    except (KeyError, ValidationError):
+        return auth.get_user(request)
+    if backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return auth.get_user(request)
+
+    key = f'users:user:{user_id}:v{_get_version(user_id)}:{session_hash}'
+    user = cache.get(key)
+    if user is not None and constant_time_compare(
+        session_hash, user.get_session_auth_hash()
+    ):
+        user.backend = backend_path
+        return user
+    # Промах или хеш не совпал: полная проверка Django (запасные
+    # ключи SECRET_KEY_FALLBACKS, сброс чужой сессии).
+    user = auth.get_user(request)
+    if user.is_authenticated:
+        cache.set(key, user, getattr(settings, 'USER_CACHE_TTL', 300))
+    return user
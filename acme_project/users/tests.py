@@ -1,3 +1,46 @@
-from django.test import TestCase
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
 
-# Create your tests here.
+User = get_user_model()
+
+
+@override_settings(
+    SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+    MIDDLEWARE=[
+        'users.middleware.CachedAuthenticationMiddleware'
+        if name == 'django.contrib.auth.middleware.AuthenticationMiddleware'
+        else name
+        for name in settings.MIDDLEWARE
+    ],
+)
+class CachedAuthenticationTest(TestCase):
+    """Сессия и пользователь из общего кеша (как при ACME_REDIS_URL)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('user', password='пароль-123')
+        # Поиск тегов с пустой строкой не обращается к БД.
+        cls.url = reverse('birthday:tag_search')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+        # Первый запрос кладёт сессию и пользователя в кеш.
+        self.client.get(self.url)
+
+    def test_no_queries(self):
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_logout(self):
+        self.client.post(reverse('logout'))
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+    def test_password_change(self):
+        self.user.set_password('другой-пароль-456')
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, 302)